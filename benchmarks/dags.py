@@ -0,0 +1,104 @@
+"""
+Synthetic workflow generator: wide fan-outs, deep chains, stacked diamonds
+and router-heavy graphs of any size. Benchmarks build graphs in process;
+the CLI writes a DSL file the runtime can load.
+
+    python -m benchmarks.dags --shape diamond --nodes 1000 > /tmp/diamond.yaml
+    python -m runtime.main --no-db --file /tmp/diamond.yaml --trace /tmp/diamond.json
+"""
+import argparse
+import sys
+import yaml
+from typing import Any, Callable, Dict
+
+from runtime.nodes import NODE_CLASSES
+from runtime.nodes.simple import BaseNode
+from runtime.parser.dsl_parser import WorkflowGraph, parse_workflow
+
+class NoopNode(BaseNode):
+    """Does nothing, so a benchmark run measures scheduling overhead only."""
+    def run(self, inputs: Dict[str, Any]) -> Any:
+        return {"ok": True}
+
+class SpinNode(BaseNode):
+    """Pure-Python busy loop, a stand-in for CPU-bound parsing or embedding nodes."""
+    def run(self, inputs: Dict[str, Any]) -> Any:
+        total = 0
+        for i in range(int(inputs.get("iterations", 1_000_000))):
+            total = (total + i * i) % 1_000_003
+        return {"total": total, "echo": inputs.get("payload")}
+
+NODE_CLASSES.setdefault("noop", NoopNode)
+NODE_CLASSES.setdefault("spin", SpinNode)
+
+def wide_dag(width: int, node_type: str = "noop", inputs: Dict[str, Any] = None,
+             edge_type: str = "noop") -> Dict[str, Any]:
+    # root -> n0..n{width-1} -> sink; root and sink are `edge_type`
+    nodes = {"root": {"type": edge_type, "inputs": dict(inputs or {}) if edge_type == node_type else {}}}
+    for i in range(width):
+        nodes[f"n{i}"] = {"type": node_type, "depends_on": ["root"], "inputs": dict(inputs or {})}
+    nodes["sink"] = {"type": edge_type, "depends_on": [f"n{i}" for i in range(width)],
+                     "inputs": dict(inputs or {}) if edge_type == node_type else {}}
+    return {"id": f"wide_{width}", "nodes": nodes}
+
+def deep_dag(depth: int, node_type: str = "noop", inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+    # n0 -> n1 -> ... -> n{depth-1}
+    nodes = {"n0": {"type": node_type, "inputs": dict(inputs or {})}}
+    for i in range(1, depth):
+        nodes[f"n{i}"] = {"type": node_type, "depends_on": [f"n{i - 1}"], "inputs": dict(inputs or {})}
+    return {"id": f"deep_{depth}", "nodes": nodes}
+
+def diamond_dag(diamonds: int, node_type: str = "noop", inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+    # d0 -> (l0, r0) -> d1 -> (l1, r1) -> ... -> d{diamonds}
+    nodes = {"d0": {"type": node_type, "inputs": dict(inputs or {})}}
+    for i in range(diamonds):
+        for side in ("l", "r"):
+            nodes[f"{side}{i}"] = {"type": node_type, "depends_on": [f"d{i}"], "inputs": dict(inputs or {})}
+        nodes[f"d{i + 1}"] = {"type": node_type, "depends_on": [f"l{i}", f"r{i}"], "inputs": dict(inputs or {})}
+    return {"id": f"diamond_{diamonds}", "nodes": nodes}
+
+def router_dag(stages: int, node_type: str = "noop", inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+    # Per stage: router -> (a | b, by condition) -> join. Stages alternate
+    # routes, so half the branch nodes are skipped.
+    nodes = {}
+    for i in range(stages):
+        route = "a" if i % 2 == 0 else "b"
+        router = {"type": "router", "inputs": {"intent": route}}
+        if i:
+            router["depends_on"] = [f"join{i - 1}"]
+        nodes[f"route{i}"] = router
+        for branch in ("a", "b"):
+            nodes[f"{branch}{i}"] = {"type": node_type, "depends_on": [f"route{i}"], "inputs": dict(inputs or {}),
+                                     "condition": f"{{{{ route{i}.intent == '{branch}' }}}}"}
+        nodes[f"join{i}"] = {"type": node_type, "depends_on": [f"a{i}", f"b{i}"], "inputs": dict(inputs or {})}
+    return {"id": f"router_{stages}", "nodes": nodes}
+
+# shape -> builder(nodes, node_type, inputs), sized to about `nodes` nodes
+SHAPES: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "wide": lambda n, t="noop", i=None: wide_dag(max(n - 2, 1), t, i, edge_type=t),
+    "deep": lambda n, t="noop", i=None: deep_dag(max(n, 1), t, i),
+    "diamond": lambda n, t="noop", i=None: diamond_dag(max((n - 1) // 3, 1), t, i),
+    "router": lambda n, t="noop", i=None: router_dag(max(n // 4, 1), t, i),
+}
+
+def generate(shape: str, nodes: int, node_type: str = "noop", inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+    """A `shape` workflow with about `nodes` nodes (within a stage of the requested size)."""
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape '{shape}', expected one of {', '.join(SHAPES)}")
+    return SHAPES[shape](nodes, node_type, inputs)
+
+def build_graph(dsl: Dict[str, Any]) -> WorkflowGraph:
+    return parse_workflow(yaml.safe_dump(dsl, sort_keys=False))
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic workflow generator")
+    parser.add_argument("--shape", choices=list(SHAPES), default="wide")
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--node-type", default="math", help="Node type (noop/spin only exist inside benchmarks)")
+    args = parser.parse_args()
+
+    inputs = {"a": 1, "b": 2} if args.node_type == "math" else None
+    yaml.safe_dump(generate(args.shape, args.nodes, args.node_type, inputs), sys.stdout, sort_keys=False)
+
+if __name__ == "__main__":
+    main()
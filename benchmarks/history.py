@@ -0,0 +1,89 @@
+"""
+Conversation history retrieval on a large messages table.
+
+Fills a SQLite database with `--messages` rows spread over
+`--conversations` conversations, then times one chat turn's history read
+three ways: the old query (whole table, sliced in Python), the windowed
+`(conversation_id, seq)` query, and the ConversationMemory ring buffer.
+
+    python -m benchmarks.history --messages 1000000 --conversations 10000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+def fill(session, messages: int, conversations: int, chunk: int = 50000):
+    from sqlalchemy import insert
+    from runtime.db.db import Conversation, Message
+
+    conv_ids = [str(uuid.uuid4()) for _ in range(conversations)]
+    session.execute(insert(Conversation), [{"id": c} for c in conv_ids])
+    now = time.time()
+    rows = []
+    for i in range(messages):
+        # Round-robin, like interleaved chat sessions
+        rows.append({"id": str(uuid.uuid4()), "conversation_id": conv_ids[i % conversations],
+                     "role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}",
+                     "seq": i // conversations + 1, "created_at": now + i})
+        if len(rows) == chunk:
+            session.execute(insert(Message), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Message), rows)
+    session.commit()
+    return conv_ids
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation history benchmark")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=10, help="History window per turn")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--skip-full-scan", action="store_true", help="Don't time the old whole-table query")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    # The DB layer binds its engine on import
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'history.db')}"
+    from runtime.db.db import Message, SessionLocal, init_db
+    from runtime.memory.conversation import ConversationMemory
+
+    init_db()
+    session = SessionLocal()
+    start = time.perf_counter()
+    conv_ids = fill(session, args.messages, args.conversations)
+    print(f"Inserted {args.messages:,} messages in {args.conversations:,} conversations "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    memory = ConversationMemory(conv_ids[len(conv_ids) // 2])
+
+    print(f"{'history read':<22}{'p50 (ms)':>12}")
+    if not args.skip_full_scan:
+        def full_scan():
+            msgs = session.query(Message).order_by(Message.id).all()
+            return msgs[-args.limit:]
+        print(f"{'whole table':<22}{timed(full_scan, 1):>12,.2f}")
+        session.expunge_all()
+
+    print(f"{'windowed query':<22}{timed(lambda: memory._query_messages(args.limit), args.repeat):>12,.3f}")
+    print(f"{'ring buffer':<22}{timed(lambda: memory.get_history(args.limit), args.repeat):>12,.4f}")
+
+    memory.add_message("user", "one more")
+    queried = [{"role": m["role"], "content": m["content"]} for m in memory._query_messages(args.limit)]
+    assert memory.get_history(args.limit) == queried
+    memory.close()
+    session.close()
+
+if __name__ == "__main__":
+    main()
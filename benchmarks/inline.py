@@ -0,0 +1,49 @@
+"""
+Per-node overhead of trivial nodes run inline on the scheduler thread
+versus submitted to the pool (`inline: false`), on chains of router nodes.
+
+    python -m benchmarks.inline --sizes 100 1000 5000
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from runtime.core.async_engine import AsyncWorkflowEngine
+from runtime.core.engine import WorkflowEngine
+from runtime.memory.memory import GlobalMemory
+
+from .dags import build_graph, deep_dag
+
+def router_chain(depth: int, inline: bool):
+    dsl = deep_dag(depth, "router", {"intent": "technical_issue"})
+    for config in dsl["nodes"].values():
+        config["inline"] = inline
+    return build_graph(dsl)
+
+def time_run(engine_cls, graph, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        engine = engine_cls(graph, GlobalMemory({"inputs": {}}))
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            engine.run()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline node execution benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'engine':<8}{'nodes':>8}{'pool (us/node)':>16}{'inline (us/node)':>18}{'speedup':>10}")
+    for name, engine_cls in (("thread", WorkflowEngine), ("async", AsyncWorkflowEngine)):
+        for size in args.sizes:
+            pooled = time_run(engine_cls, router_chain(size, inline=False), args.repeat)
+            inlined = time_run(engine_cls, router_chain(size, inline=True), args.repeat)
+            print(f"{name:<8}{size:>8}{1e6 * pooled / size:>16.1f}{1e6 * inlined / size:>18.1f}"
+                  f"{pooled / inlined:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
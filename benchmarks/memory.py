@@ -0,0 +1,80 @@
+"""
+Compare the versioned GlobalMemory with the previous copy-on-read class.
+
+Simulates a run where every node stores a large output and every node
+execution reads the memory (a snapshot for the new class, to_dict() for the
+old one), from several threads at once.
+
+    python -m benchmarks.memory --keys 300 --payload-kb 64 --threads 10
+"""
+import argparse
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from runtime.memory.memory import GlobalMemory
+
+class CopyingGlobalMemory:
+    """The pre-versioning GlobalMemory, kept verbatim for comparison."""
+
+    def __init__(self, initial_data: Dict[str, Any] = None):
+        self._data = initial_data or {}
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._data.copy()
+
+def fill(memory, keys: int, payload_kb: int):
+    payload = "x" * (payload_kb * 1024)
+    for i in range(keys):
+        memory.set(f"node_{i}", {"text": payload + str(i)})
+
+def read_all(memory):
+    return memory.snapshot() if isinstance(memory, GlobalMemory) else memory.to_dict()
+
+def throughput(memory, threads: int, reads_per_thread: int) -> float:
+    def reader():
+        for _ in range(reads_per_thread):
+            read_all(memory)
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return threads * reads_per_thread / (time.perf_counter() - start)
+
+def footprint(memory, keys: int) -> int:
+    # Peak extra memory when every node in a run holds its own read of the state
+    tracemalloc.start()
+    held = [read_all(memory) for _ in range(keys)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description="GlobalMemory benchmark")
+    parser.add_argument("--keys", type=int, default=300)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=10)
+    parser.add_argument("--reads", type=int, default=2000, help="Reads per thread")
+    args = parser.parse_args()
+
+    print(f"{'memory':<12}{'reads/s':>14}{'held reads (KiB)':>20}")
+    for name, cls in (("copying", CopyingGlobalMemory), ("versioned", GlobalMemory)):
+        memory = cls({"inputs": {}})
+        fill(memory, args.keys, args.payload_kb)
+        ops = throughput(memory, args.threads, args.reads)
+        peak = footprint(memory, args.keys)
+        print(f"{name:<12}{ops:>14,.0f}{peak / 1024:>20,.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Local OpenAI-compatible chat completions server for benchmarks and demos
+that shouldn't need a real OPENAI_API_KEY. Each response waits
+`--latency-ms` (time to first token), then emits `--completion-tokens`
+tokens at `--tokens-per-second`; `"stream": true` requests get SSE chunks.
+
+    python -m benchmarks.mock_llm --port 8765 --latency-ms 200 --tokens-per-second 50
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python -m runtime.main --no-db --file dsl/vnext/aws_support.yaml
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 100.0, tokens_per_second: float = 0.0,
+                 completion_tokens: int = 16):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency_ms / 1000.0
+        self.tokens_per_second = tokens_per_second  # 0: all tokens at once
+        self.completion_tokens = completion_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def handle_error(self, request, client_address):
+        # A cancelled call (a lost hedge race) closes its connection early
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+def _reply(prompt: str) -> str:
+    # Keeps the demo workflows on their main branch
+    if "intent classifier" in prompt.lower():
+        return "technical_issue"
+    return "Mock answer"
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Otherwise the body write waits on the client's delayed ACK (~40ms) on
+    # every keep-alive request after the first, whatever --latency-ms says
+    disable_nagle_algorithm = True
+    server: MockLLMServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.count()
+        prompt = " ".join(str(m.get("content") or "") for m in body.get("messages", []))
+        tokens = self._tokens(prompt, body)
+        usage = {"prompt_tokens": max(len(prompt) // 4, 1), "completion_tokens": len(tokens)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        time.sleep(self.server.latency)
+        if body.get("stream"):
+            self._stream(body, tokens, usage)
+            return
+        time.sleep(self._generation_time(len(tokens)))
+        self._send_json(200, {
+            "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                         "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _tokens(self, prompt: str, body: Dict[str, Any]) -> List[str]:
+        words = _reply(prompt).split(" ")
+        n = min(self.server.completion_tokens, int(body.get("max_tokens") or self.server.completion_tokens))
+        words += ["lorem"] * max(n - len(words), 0)
+        return [w + " " for w in words[:max(n, 1)]]
+
+    def _generation_time(self, tokens: int) -> float:
+        rate = self.server.tokens_per_second
+        return tokens / rate if rate > 0 else 0.0
+
+    def _stream(self, body: Dict[str, Any], tokens: List[str], usage: Dict[str, int]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": body.get("model", "mock")}
+        delay = self._generation_time(1)
+        for token in tokens:
+            self._event({**chunk, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+            if delay:
+                time.sleep(delay)
+        self._event({**chunk, "choices": [], "usage": usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _event(self, record: Dict[str, Any]):
+        self._write_chunk(f"data: {json.dumps(record)}\n\n".encode())
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+def start_mock_llm(host: str = "127.0.0.1", port: int = 0, **kwargs) -> Tuple[MockLLMServer, threading.Thread]:
+    """Serve on a background thread (port 0 picks a free port); stop with `server.shutdown()`."""
+    server = MockLLMServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True)
+    thread.start()
+    return server, thread
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation speed (0: instant)")
+    parser.add_argument("--completion-tokens", type=int, default=16, help="Tokens per response (capped by max_tokens)")
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), args.latency_ms, args.tokens_per_second, args.completion_tokens)
+    print(f"Mock LLM on {server.base_url} (latency {args.latency_ms}ms, {args.tokens_per_second or 'unlimited'} tokens/s)")
+    print(f"  export OPENAI_API_KEY=mock OPENAI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Throughput of a CPU-bound synthetic node (`spin`) on the thread pool versus
+the process pool with a growing number of workers. Threads stay flat under
+the GIL; processes should scale with the number of cores.
+
+    python -m benchmarks.process_pool --nodes 32 --iterations 2000000
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from runtime.core.engine import WorkflowEngine
+from runtime.core.process_pool import configure_process_pool, get_process_pool, shutdown_process_pool
+from runtime.memory.memory import GlobalMemory
+
+from .dags import build_graph, wide_dag
+
+def time_run(graph) -> float:
+    engine = WorkflowEngine(graph, GlobalMemory({"inputs": {}}))
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.run()
+        return time.perf_counter() - start
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Process pool scaling benchmark")
+    parser.add_argument("--nodes", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1))))
+    args = parser.parse_args()
+
+    dsl = wide_dag(args.nodes, "spin", {"iterations": args.iterations})
+    dsl["resources"] = {"default": args.nodes}  # the pool size is the only limit
+    thread_graph = build_graph(dsl)
+    dsl["executors"] = {"spin": "process"}
+    process_graph = build_graph(dsl)
+
+    print(f"{args.nodes} spin nodes x {args.iterations} iterations, {cores} cores")
+    print(f"{'executor':<10}{'workers':>8}{'time (s)':>10}{'nodes/s':>10}{'speedup':>10}")
+    baseline = time_run(thread_graph)
+    print(f"{'thread':<10}{args.nodes:>8}{baseline:>10.2f}{args.nodes / baseline:>10.1f}{1.0:>9.1f}x")
+    for workers in args.workers:
+        configure_process_pool(workers)
+        get_process_pool()  # start (warm) the workers outside the timing
+        elapsed = time_run(process_graph)
+        print(f"{'process':<10}{workers:>8}{elapsed:>10.2f}{args.nodes / elapsed:>10.1f}{baseline / elapsed:>9.1f}x")
+    shutdown_process_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark runner: scheduler overhead on synthetic workflows (see dags.py)
+and end-to-end LLM workflow runs against the local mock server (see
+mock_llm.py), with per-run p50/p99 latency and runs/s.
+
+Results can be saved as a baseline and later runs compared against it;
+metrics that got worse by more than `--tolerance` are reported as
+regressions (exit status 1).
+
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run                        # compare with .bench/baseline.json
+    python -m benchmarks.run --shapes deep --sizes 1000 --no-llm
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from runtime.core.async_engine import AsyncWorkflowEngine
+from runtime.core.engine import WorkflowEngine
+from runtime.memory.memory import GlobalMemory
+from runtime.nodes.clients import reload_settings
+
+from .dags import SHAPES, build_graph, generate
+from .mock_llm import start_mock_llm
+
+# metric -> True when higher is better
+METRICS = {"overhead_us_per_node": False, "p50_ms": False, "p99_ms": False, "runs_per_s": True}
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def latency_stats(samples: List[float], wall: float) -> Dict[str, float]:
+    return {
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "runs_per_s": len(samples) / wall,
+    }
+
+def bench_scheduler(shape: str, size: int, engine_cls, repeat: int) -> Dict[str, float]:
+    graph = build_graph(generate(shape, size))
+    nodes = len(graph.nodes)
+    # Keep big graphs from dominating the suite's wall time
+    runs = max(3, min(repeat, 20000 // nodes))
+    samples = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(runs):
+            run_start = time.perf_counter()
+            engine_cls(graph, GlobalMemory({"inputs": {}})).run()
+            samples.append(time.perf_counter() - run_start)
+    stats = latency_stats(samples, time.perf_counter() - start)
+    stats["overhead_us_per_node"] = statistics.median(samples) / nodes * 1e6
+    stats["nodes"] = nodes
+    return stats
+
+async def _llm_runs(graph, runs: int, concurrency: int) -> List[float]:
+    slots = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one():
+        async with slots:
+            run_start = time.perf_counter()
+            await AsyncWorkflowEngine(graph, GlobalMemory({"inputs": {}})).arun()
+            samples.append(time.perf_counter() - run_start)
+
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return samples
+
+async def _llm_bench(graph, runs: int, concurrency: int) -> Tuple[List[float], float]:
+    # Warm-up on the measuring loop: async clients are per loop, so the
+    # measured runs reuse its client and open connections
+    await _llm_runs(graph, 1, 1)
+    start = time.perf_counter()
+    samples = await _llm_runs(graph, runs, concurrency)
+    return samples, time.perf_counter() - start
+
+def bench_llm(width: int, runs: int, concurrency: int, latency_ms: float, tokens_per_second: float) -> Dict[str, float]:
+    server, _ = start_mock_llm(latency_ms=latency_ms, tokens_per_second=tokens_per_second)
+    saved = {key: os.environ.get(key) for key in ("OPENAI_API_KEY", "OPENAI_BASE_URL")}
+    os.environ.update(OPENAI_API_KEY="mock", OPENAI_BASE_URL=server.base_url)
+    reload_settings()
+    try:
+        dsl = generate("wide", width + 2, "llm", {"model": "mock", "prompt": "Summarize {{ inputs }}", "max_tokens": 16})
+        graph = build_graph(dsl)
+        with contextlib.redirect_stdout(io.StringIO()):
+            samples, elapsed = asyncio.run(_llm_bench(graph, runs, concurrency))
+        stats = latency_stats(samples, elapsed)
+        stats["nodes"] = len(graph.nodes)
+        stats["llm_calls"] = server.requests
+        return stats
+    finally:
+        server.shutdown()
+        server.server_close()
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        reload_settings()
+
+def environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for case, stats in results.items():
+        for metric, higher_is_better in METRICS.items():
+            old = baseline.get(case, {}).get(metric)
+            new = stats.get(metric)
+            if not old or new is None:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > tolerance:
+                regressions.append(f"{case} {metric}: {old:,.2f} -> {new:,.2f} ({change:+.0%} worse)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Workflow runtime benchmark suite")
+    parser.add_argument("--shapes", nargs="*", default=list(SHAPES), choices=list(SHAPES))
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000, 10000])
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread", help="Engine for the scheduler cases")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per scheduler case (fewer for big graphs)")
+    parser.add_argument("--no-llm", action="store_true", help="Skip the mock-LLM workflow case")
+    parser.add_argument("--llm-width", type=int, default=8, help="Parallel LLM nodes per workflow")
+    parser.add_argument("--llm-runs", type=int, default=64)
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="Concurrent workflow runs")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--baseline", default=".bench/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slowdown reported as a regression")
+    parser.add_argument("--json", default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    engine_cls = AsyncWorkflowEngine if args.engine == "async" else WorkflowEngine
+    results: Dict[str, Dict[str, float]] = {}
+
+    print(f"{'case':<32}{'nodes':>7}{'us/node':>10}{'p50 ms':>11}{'p99 ms':>11}{'runs/s':>10}")
+    def show(case: str, stats: Dict[str, float]):
+        overhead = stats.get("overhead_us_per_node")
+        print(f"{case:<32}{stats['nodes']:>7}{overhead if overhead is not None else float('nan'):>10.1f}"
+              f"{stats['p50_ms']:>11.2f}{stats['p99_ms']:>11.2f}{stats['runs_per_s']:>10.1f}")
+
+    for shape in args.shapes:
+        for size in args.sizes:
+            case = f"scheduler/{args.engine}/{shape}/{size}"
+            results[case] = bench_scheduler(shape, size, engine_cls, args.repeat)
+            show(case, results[case])
+
+    if not args.no_llm:
+        case = f"llm/wide/{args.llm_width}"
+        results[case] = bench_llm(args.llm_width, args.llm_runs, args.llm_concurrency,
+                                  args.llm_latency_ms, args.llm_tokens_per_second)
+        show(case, results[case])
+
+    report = {"environment": environment(), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != report["environment"]:
+            print(f"Note: baseline was recorded on {baseline.get('environment')}")
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1
+        else:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
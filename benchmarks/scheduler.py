@@ -0,0 +1,158 @@
+"""
+Compare the in-degree scheduler in WorkflowEngine.run with the previous
+full-rescan scheduler on synthetic wide and deep DAGs.
+
+The in-degree scheduler wins on deep chains (the rescan is O(V^2)) and
+runs about even on wide fan-outs of trivially short thread nodes, where
+the rescan queues the whole level in the pool at once: per-class pools
+plus one queued node per slot keep workers busy between scheduler
+wake-ups. The "inline" column runs the same nodes with `inline: true`,
+which removes the pool hand-off altogether.
+
+    python -m benchmarks.scheduler --sizes 100 300 1000
+"""
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from runtime.core.engine import WorkflowEngine
+from runtime.memory.memory import GlobalMemory
+from runtime.nodes import create_node
+
+from .dags import build_graph, deep_dag, wide_dag
+
+class RescanWorkflowEngine(WorkflowEngine):
+    """
+    The pre-event-driven scheduler loop, copied verbatim from the original
+    WorkflowEngine.run. Inputs, conditions and node creation go through
+    the current engine's helpers (`_resolve_inputs`, `_check_condition`,
+    `create_node`), so the comparison isolates the scheduling loop.
+    """
+
+    def run(self):
+        nodes_to_run = set(self.graph.nodes.keys())
+        
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = {}
+            
+            while len(self.completed_nodes) + len(self.skipped_nodes) < len(nodes_to_run):
+                # Find ready nodes
+                ready_nodes = []
+                nodes_to_skip = []
+
+                with self.lock:
+                    for node_id in nodes_to_run:
+                        if node_id in self.completed_nodes or node_id in self.skipped_nodes:
+                            continue
+                        if node_id in futures:
+                            continue
+                        
+                        deps = self.graph.dependencies.get(node_id, set())
+                        
+                        # Check if dependencies are met (either completed or skipped)
+                        # If any dependency is SKIPPED, this node should also be SKIPPED (propagation)
+                        # UNLESS we want to support "join" logic where only one branch is needed.
+                        # For now, let's assume strict dependency: if dep is skipped, I am skipped.
+                        
+                        deps_completed = deps.issubset(self.completed_nodes)
+                        deps_skipped = deps.issubset(self.skipped_nodes)
+                        deps_all_finished = deps.issubset(self.completed_nodes.union(self.skipped_nodes))
+
+                        if deps_all_finished:
+                            if deps and deps_skipped:
+                                # All dependencies skipped -> Propagate skip
+                                nodes_to_skip.append(node_id)
+                            else:
+                                # At least one dependency completed (and others skipped) OR No dependencies -> Run
+                                ready_nodes.append(node_id)
+                
+                # Process skipped nodes immediately
+                if nodes_to_skip:
+                    with self.lock:
+                        for node_id in nodes_to_skip:
+                            self.skipped_nodes.add(node_id)
+                            print(f"Node {node_id} SKIPPED (dependency skipped).")
+                    continue
+
+                if not ready_nodes and not futures and (len(self.completed_nodes) + len(self.skipped_nodes) < len(nodes_to_run)):
+                    raise RuntimeError("Deadlock detected! Cycle in graph or missing dependencies.")
+
+                # Submit ready nodes
+                for node_id in ready_nodes:
+                    node_config = self.graph.nodes[node_id]
+                    
+                    # Check Condition
+                    condition = node_config.get("condition")
+                    if condition and not self._check_condition(condition):
+                        with self.lock:
+                            self.skipped_nodes.add(node_id)
+                        print(f"Node {node_id} SKIPPED (condition false).")
+                        continue
+
+                    print(f"Submitting node: {node_id}")
+                    node_type = node_config.get("type")
+                    
+                    # Resolve inputs just before execution
+                    inputs = self._resolve_inputs(node_config.get("inputs", {}))
+                    
+                    node_instance = create_node(node_id, node_type, node_config)
+                    future = executor.submit(node_instance.run, inputs)
+                    futures[node_id] = future
+
+                # Wait for at least one to finish
+                if futures:
+                    done, _ = wait(list(futures.values()), return_when="FIRST_COMPLETED")
+                    
+                    for node_id, future in list(futures.items()):
+                        if future in done:
+                            try:
+                                result = future.result()
+                                self.memory.set(node_id, result)
+                                with self.lock:
+                                    self.completed_nodes.add(node_id)
+                                del futures[node_id]
+                                print(f"Node {node_id} completed.")
+                            except Exception as e:
+                                print(f"Node {node_id} failed: {e}")
+                                raise e
+                else:
+                    time.sleep(0.1)
+
+        print("Workflow execution completed.")
+
+def time_run(engine_cls, graph, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        engine = engine_cls(graph, GlobalMemory({"inputs": {}}))
+        # Engine progress lines would dominate the timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            engine.run()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def inline_graph(dsl):
+    for config in dsl["nodes"].values():
+        config["inline"] = True
+    return build_graph(dsl)
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'shape':<8}{'nodes':>8}{'rescan (s)':>14}{'event (s)':>14}{'speedup':>10}{'inline (s)':>14}{'speedup':>10}")
+    for shape, factory in (("wide", wide_dag), ("deep", deep_dag)):
+        for size in args.sizes:
+            graph = build_graph(factory(size))
+            rescan = time_run(RescanWorkflowEngine, graph, args.repeat)
+            event = time_run(WorkflowEngine, graph, args.repeat)
+            inline = time_run(WorkflowEngine, inline_graph(factory(size)), args.repeat)
+            print(f"{shape:<8}{len(graph.nodes):>8}{rescan:>14.4f}{event:>14.4f}{rescan / event:>9.1f}x"
+                  f"{inline:>14.4f}{rescan / inline:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
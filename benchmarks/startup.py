@@ -0,0 +1,90 @@
+"""
+CLI cold-start regression check, based on `python -X importtime`.
+
+Imports `runtime.main` in a fresh interpreter, fails if it takes longer than
+the budget or pulls in a subsystem a `--no-db` run shouldn't load, and
+times a whole `--no-db` run of a one-node workflow.
+
+    python -m benchmarks.startup --budget-ms 250
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# Optional subsystems that must stay lazy
+FORBIDDEN = ("sqlalchemy", "psycopg2", "openai", "httpx")
+
+TRIVIAL_WORKFLOW = """
+id: startup_probe
+nodes:
+  hello:
+    type: print
+    inputs:
+      message: "hello {{ inputs.query }}"
+"""
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every import made by `import module`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def best_import(module: str, repeat: int) -> Tuple[int, Dict[str, int]]:
+    best_total, best_rows = None, None
+    for _ in range(repeat):
+        rows = import_times(module)
+        total = next(cumulative for name, _, cumulative in rows if name == module)
+        if best_total is None or total < best_total:
+            best_total, best_rows = total, rows
+    return best_total, {name: self_us for name, self_us, _ in best_rows}
+
+def cli_run_time(repeat: int) -> float:
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as f:
+        f.write(TRIVIAL_WORKFLOW)
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-m", "runtime.main", "--no-db", "--no-plan-cache", "--file", f.name],
+                           capture_output=True, check=True)
+            best = min(best, time.perf_counter() - start)
+        return best
+    finally:
+        os.unlink(f.name)
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup budget check")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="Max cumulative import time of runtime.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    total_us, self_times = best_import("runtime.main", args.repeat)
+    print(f"import runtime.main: {total_us / 1000:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    print("slowest imports (self time):")
+    for name, self_us in sorted(self_times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:>7.1f}ms  {name}")
+    print(f"--no-db run of a one-node workflow: {cli_run_time(args.repeat) * 1000:.0f}ms wall")
+
+    failures = []
+    loaded = sorted({name.split(".")[0] for name in self_times} & set(FORBIDDEN))
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    if total_us / 1000 > args.budget_ms:
+        failures.append(f"import time {total_us / 1000:.1f}ms is over the {args.budget_ms:.0f}ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional, TextIO
+
+from .core.async_engine import AsyncWorkflowEngine
+from .memory.memory import GlobalMemory
+from .memory.memo import MemoStore
+from .memory.result_cache import ResultCache
+from .parser.dsl_parser import WorkflowGraph
+
+class _ResultWriter:
+    """Writes one JSON line per finished run, in completion or input order."""
+
+    def __init__(self, out: TextIO, preserve_order: bool):
+        self.out = out
+        self.preserve_order = preserve_order
+        self._buffer: Dict[int, Dict[str, Any]] = {}
+        self._next_index = 0
+
+    def write(self, record: Dict[str, Any]):
+        if not self.preserve_order:
+            self._write_line(record)
+            return
+        self._buffer[record["index"]] = record
+        while self._next_index in self._buffer:
+            self._write_line(self._buffer.pop(self._next_index))
+            self._next_index += 1
+
+    def _write_line(self, record: Dict[str, Any]):
+        self.out.write(json.dumps(record, default=str) + "\n")
+        self.out.flush()
+
+def _row_inputs(line: str) -> Dict[str, Any]:
+    # Rows are either {"inputs": {...}} or the inputs themselves
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError(f"expected a JSON object, got {type(row).__name__}")
+    if isinstance(row.get("inputs"), dict):
+        return row["inputs"]
+    return row
+
+async def _run_row(graph: WorkflowGraph, index: int, line_number: int, line: str,
+                   result_cache: Optional[ResultCache], memo: Optional[MemoStore],
+                   persistence=None, workflow_id: Optional[str] = None) -> Dict[str, Any]:
+    try:
+        inputs = _row_inputs(line)
+    except ValueError as e:  # includes json.JSONDecodeError
+        # A bad row fails on its own; the rest of the batch keeps going
+        return {"index": index, "line": line_number, "status": "FAILED",
+                "error": f"invalid row on line {line_number}: {e}", "duration": 0.0, "memory": {}}
+
+    memory = GlobalMemory({"inputs": inputs})
+    run_id = persistence.start_run(workflow_id) if persistence and workflow_id else None
+    engine = AsyncWorkflowEngine(graph, memory, on_event=persistence.events(run_id) if run_id else None,
+                                 result_cache=result_cache, memo=memo)
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"index": index}
+    if run_id:
+        record["run_id"] = run_id
+    try:
+        await engine.arun()
+        record["status"] = "COMPLETED"
+    except Exception as e:
+        record["status"] = "FAILED"
+        record["error"] = str(e)
+    record["duration"] = round(time.perf_counter() - start, 6)
+    record["memory"] = memory.to_dict()
+    if run_id:
+        persistence.finish_run(run_id, record["status"], record["memory"])
+    return record
+
+async def run_batch_async(graph: WorkflowGraph, batch_path: str, out: TextIO, concurrency: int = 16,
+                          preserve_order: bool = False, result_cache: Optional[ResultCache] = None,
+                          memo: Optional[MemoStore] = None, persistence=None,
+                          workflow_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run `graph` once per JSONL row of `batch_path`, at most `concurrency`
+    runs at a time on one event loop, writing results to `out` as they finish.
+    The graph (and its compiled templates), LLM clients, result cache and
+    memo store are shared by all rows. With a PersistenceWriter (`persistence`) each row is
+    recorded as a run of `workflow_id`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    writer = _ResultWriter(out, preserve_order)
+    tasks = set()
+    summary = {"runs": 0, "failed": 0}
+
+    async def run_one(index: int, line_number: int, line: str):
+        try:
+            record = await _run_row(graph, index, line_number, line, result_cache, memo, persistence, workflow_id)
+        finally:
+            semaphore.release()
+        summary["runs"] += 1
+        if record["status"] == "FAILED":
+            summary["failed"] += 1
+        writer.write(record)
+
+    start = time.perf_counter()
+    index = 0
+    with open(batch_path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            # Acquire before creating the task so a huge file never has more
+            # than `concurrency` runs (or rows) in memory at once
+            await semaphore.acquire()
+            task = asyncio.create_task(run_one(index, line_number, line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            index += 1
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    summary["elapsed"] = time.perf_counter() - start
+    summary["runs_per_second"] = summary["runs"] / summary["elapsed"] if summary["elapsed"] else 0.0
+    return summary
+
+def run_batch(graph: WorkflowGraph, batch_path: str, output_path: str, concurrency: int = 16,
+              preserve_order: bool = False, quiet: bool = False,
+              result_cache: Optional[ResultCache] = None, memo: Optional[MemoStore] = None,
+              persistence=None, workflow_id: Optional[str] = None) -> Dict[str, Any]:
+    with open(output_path, "w") as out:
+        # Per-node progress lines from hundreds of concurrent runs are noise
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            summary = asyncio.run(run_batch_async(
+                graph, batch_path, out, concurrency, preserve_order, result_cache, memo, persistence, workflow_id
+            ))
+
+    print(f"Batch finished: {summary['runs']} runs ({summary['failed']} failed) "
+          f"in {summary['elapsed']:.2f}s, {summary['runs_per_second']:.1f} runs/s")
+    print(f"Results written to {output_path}")
+    return summary
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Tuple
+
+from .engine import WorkflowEngine
+from .process_pool import get_process_pool
+from .resilience import arun_with_policy, node_policy
+
+class AsyncWorkflowEngine(WorkflowEngine):
+    """
+    Runs a workflow on an asyncio event loop.
+
+    Every node is awaited through `BaseNode.arun`: nodes with a native
+    async implementation (sleep, mock_search, llm) wait without holding a
+    thread, sync-only nodes are offloaded to the loop's default executor
+    and inline nodes (see BaseNode.inline) run directly on the loop.
+    Many runs can share one loop, e.g. `asyncio.gather(*(e.arun() for e in engines))`.
+    """
+
+    async def _arun_in_process(self, node, inputs):
+        return await asyncio.wrap_future(get_process_pool().submit(node, inputs))
+
+    def _arunner(self, node, inputs):
+        policy = node_policy(node, self.graph.workflow_id)
+        return node.arun(inputs) if policy is None else arun_with_policy(node, policy, inputs)
+
+    async def arun(self):
+        tracker = self._start_tracking()
+
+        # Tasks report back through this queue, mirroring WorkflowEngine.run
+        done_queue: "asyncio.Queue[Tuple[str, asyncio.Task]]" = asyncio.Queue()
+        in_flight = {}
+
+        try:
+            while not tracker.is_finished():
+                # Highest critical-path node first, within resource class caps
+                while True:
+                    node_id = tracker.ready.pop()
+                    if node_id is None:
+                        break
+                    action = tracker.dispatch(node_id)
+                    if action == "commit":
+                        self._commit_speculation(tracker, node_id)
+                    prepared = self._prepare_node(tracker, node_id, action == "speculate") if action in ("run", "speculate") else None
+                    if prepared is None:
+                        tracker.ready.release(node_id)
+                        continue
+
+                    node_instance, inputs = prepared
+                    if self.trace is not None:
+                        self.trace.submitted(node_id)
+                    if self._in_process(node_instance):
+                        run = self._arun_in_process(node_instance, inputs)
+                        thread = "process-pool"
+                    elif self._is_inline(node_instance) and action == "run":
+                        self._run_inline(tracker, node_instance, inputs)
+                        continue
+                    else:
+                        run = self._arunner(node_instance, inputs)
+                        thread = None
+                    if self.trace is not None:
+                        run = self.trace.awrap(node_id, run, thread)
+
+                    task = asyncio.create_task(run, name=node_id)
+                    task.add_done_callback(lambda t, node_id=node_id: done_queue.put_nowait((node_id, t)))
+                    in_flight[node_id] = task
+                    self._running[node_id] = node_instance
+                    if action == "speculate":
+                        self._speculations[node_id].handle = task
+
+                if tracker.is_finished():
+                    break
+
+                if not in_flight:
+                    raise RuntimeError("Deadlock detected! Cycle in graph or missing dependencies.")
+
+                node_id, task = await done_queue.get()
+                del in_flight[node_id]
+                tracker.ready.release(node_id)
+                self._running.pop(node_id, None)
+                if self._speculation_done(tracker, node_id, task):
+                    continue
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"Node {node_id} failed: {e}")
+                    self._emit("node_failed", node_id, str(e))
+                    raise e
+
+                self._complete_node(tracker, node_id, result)
+
+            if self.trace is not None:
+                self.trace.end()
+        finally:
+            # Nothing is waiting for these results any more (failure or
+            # cancellation); sync nodes offloaded to threads are asked to stop
+            for task in in_flight.values():
+                task.cancel()
+            self._cancel_running()
+
+        print("Workflow execution completed.")
+
+    def run(self):
+        asyncio.run(self.arun())
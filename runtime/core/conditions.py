@@ -0,0 +1,237 @@
+import ast
+import operator
+from typing import Any, Callable
+
+from jinja2 import Undefined, nodes
+from jinja2.exceptions import TemplateSyntaxError
+
+from .templates import template_cache
+
+# A compiled expression takes a name lookup (e.g. GlobalMemory.get) and
+# returns the value of the expression.
+Evaluator = Callable[[Callable[[str], Any]], Any]
+
+# Missing names, keys and attributes evaluate to Jinja's Undefined, as in
+# the sandbox: it is falsy and an empty container, and reading anything
+# from it raises (the condition is then false)
+_UNDEFINED = Undefined()
+
+_COMPARE_OPS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gteq": operator.ge,
+    "lt": operator.lt,
+    "lteq": operator.le,
+    # A missing value (None) is an empty container, like Jinja's Undefined
+    "in": lambda a, b: b is not None and a in b,
+    "notin": lambda a, b: b is None or a not in b,
+}
+
+_BINARY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+}
+
+# Side-effect free str methods a condition may call, e.g. `x.text.strip()`
+_SAFE_METHODS = {"strip", "lstrip", "rstrip", "lower", "upper", "startswith", "endswith"}
+
+_FILTERS = {
+    "lower": lambda v: v.lower(),
+    "upper": lambda v: v.upper(),
+    "trim": lambda v: v.strip(),
+    "length": len,
+    "int": int,
+    "float": float,
+}
+
+_TESTS = {
+    "defined": lambda v: not isinstance(v, Undefined),
+    "undefined": lambda v: isinstance(v, Undefined),
+    "none": lambda v: v is None,
+}
+
+class UnsupportedCondition(Exception):
+    pass
+
+def _getattr(obj: Any, name: str) -> Any:
+    if name.startswith("_"):
+        raise UnsupportedCondition(f"access to private attribute '{name}'")
+    if isinstance(obj, dict):
+        return obj.get(name, _UNDEFINED)
+    return getattr(obj, name, _UNDEFINED)
+
+def _getitem(obj: Any, key: Any) -> Any:
+    if isinstance(obj, Undefined):
+        return obj[key]  # raises, like the sandbox
+    try:
+        return obj[key]
+    except (LookupError, TypeError):
+        return _UNDEFINED
+
+def _compile(node: nodes.Node) -> Evaluator:
+    if isinstance(node, nodes.Const):
+        value = node.value
+        return lambda lookup: value
+
+    if isinstance(node, nodes.Name):
+        name = node.name
+        return lambda lookup: lookup(name)
+
+    if isinstance(node, (nodes.List, nodes.Tuple)):
+        items = [_compile(item) for item in node.items]
+        container = list if isinstance(node, nodes.List) else tuple
+        return lambda lookup: container(item(lookup) for item in items)
+
+    if isinstance(node, nodes.Dict):
+        pairs = [(_compile(pair.key), _compile(pair.value)) for pair in node.items]
+        return lambda lookup: {key(lookup): value(lookup) for key, value in pairs}
+
+    if isinstance(node, nodes.Getattr):
+        if node.attr.startswith("_"):
+            raise UnsupportedCondition(f"access to private attribute '{node.attr}'")
+        target = _compile(node.node)
+        attr = node.attr
+        return lambda lookup: _getattr(target(lookup), attr)
+
+    if isinstance(node, nodes.Getitem):
+        target = _compile(node.node)
+        key = _compile(node.arg)
+        return lambda lookup: _getitem(target(lookup), key(lookup))
+
+    if isinstance(node, nodes.Not):
+        operand = _compile(node.node)
+        return lambda lookup: not operand(lookup)
+
+    if isinstance(node, nodes.And):
+        left, right = _compile(node.left), _compile(node.right)
+        return lambda lookup: left(lookup) and right(lookup)
+
+    if isinstance(node, nodes.Or):
+        left, right = _compile(node.left), _compile(node.right)
+        return lambda lookup: left(lookup) or right(lookup)
+
+    if isinstance(node, nodes.BinExpr) and node.operator in _BINARY_OPS:
+        left, right = _compile(node.left), _compile(node.right)
+        fn = _BINARY_OPS[node.operator]
+        return lambda lookup: fn(left(lookup), right(lookup))
+
+    if isinstance(node, nodes.Concat):
+        parts = [_compile(part) for part in node.nodes]
+        return lambda lookup: "".join(str(part(lookup)) for part in parts)
+
+    if isinstance(node, nodes.Compare):
+        first = _compile(node.expr)
+        ops = []
+        for operand in node.ops:
+            if operand.op not in _COMPARE_OPS:
+                raise UnsupportedCondition(f"operator '{operand.op}'")
+            ops.append((_COMPARE_OPS[operand.op], _compile(operand.expr)))
+
+        def compare(lookup):
+            left = first(lookup)
+            for op, right_fn in ops:
+                right = right_fn(lookup)
+                if not op(left, right):
+                    return False
+                left = right
+            return True
+        return compare
+
+    if isinstance(node, nodes.Call):
+        if not isinstance(node.node, nodes.Getattr) or node.node.attr not in _SAFE_METHODS:
+            raise UnsupportedCondition("function call")
+        if node.kwargs or node.dyn_args or node.dyn_kwargs:
+            raise UnsupportedCondition("call with keyword or dynamic arguments")
+        target = _compile(node.node.node)
+        method = node.node.attr
+        args = [_compile(arg) for arg in node.args]
+
+        def call(lookup):
+            obj = target(lookup)
+            if not isinstance(obj, str):
+                raise TypeError(f"'{method}' called on {type(obj).__name__}")
+            return getattr(obj, method)(*[arg(lookup) for arg in args])
+        return call
+
+    if isinstance(node, nodes.Filter):
+        if node.name == "default":
+            target = _compile(node.node)
+            fallback = _compile(node.args[0]) if node.args else (lambda lookup: "")
+            return lambda lookup: _default(target(lookup), fallback, lookup)
+        if node.name not in _FILTERS or node.args or node.kwargs:
+            raise UnsupportedCondition(f"filter '{node.name}'")
+        target = _compile(node.node)
+        fn = _FILTERS[node.name]
+        return lambda lookup: fn(target(lookup))
+
+    if isinstance(node, nodes.Test):
+        if node.name not in _TESTS or node.args or node.kwargs:
+            raise UnsupportedCondition(f"test '{node.name}'")
+        target = _compile(node.node)
+        fn = _TESTS[node.name]
+        return lambda lookup: fn(target(lookup))
+
+    raise UnsupportedCondition(type(node).__name__)
+
+def _default(value: Any, fallback: Evaluator, lookup: Callable[[str], Any]) -> Any:
+    return fallback(lookup) if value is None or isinstance(value, Undefined) else value
+
+def _truth(value: Any) -> bool:
+    # Read a string result the way the fallback reads the rendered template,
+    # as a Python literal: `{{ checker.text }}` holding "False" is false
+    if isinstance(value, str):
+        return bool(ast.literal_eval(value.strip()))
+    return bool(value)
+
+def _single_expression(source: str) -> nodes.Expr:
+    """Return the expression of a `{{ expr }}` condition, ignoring surrounding whitespace."""
+    body = template_cache.env.parse(source).body
+    if len(body) != 1 or not isinstance(body[0], nodes.Output):
+        raise UnsupportedCondition("condition is not a single expression")
+    exprs = [
+        n for n in body[0].nodes
+        if not (isinstance(n, nodes.TemplateData) and not n.data.strip())
+    ]
+    if len(exprs) != 1 or isinstance(exprs[0], nodes.TemplateData):
+        raise UnsupportedCondition("condition is not a single expression")
+    return exprs[0]
+
+class CompiledCondition:
+    """
+    A node `condition`, compiled once at load time.
+
+    Expressions built from literals, names, attribute/item access,
+    comparisons, `in`, `and/or/not` and a few safe filters are turned into
+    closures that read straight from GlobalMemory. Anything else falls back
+    to rendering the template in the sandbox and reading the result as a
+    Python literal; `eval()` is never used.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._evaluate = None
+        try:
+            self._evaluate = _compile(_single_expression(source))
+        except UnsupportedCondition:
+            pass
+        except TemplateSyntaxError as e:
+            print(f"Error compiling condition {source}: {e}")
+
+    @property
+    def is_compiled(self) -> bool:
+        return self._evaluate is not None
+
+    def evaluate(self, memory) -> bool:
+        try:
+            if self._evaluate is not None:
+                return _truth(self._evaluate(lambda name: memory.get(name, _UNDEFINED)))
+            rendered = template_cache.get(self.source).render(**memory.snapshot())
+            return bool(ast.literal_eval(rendered.strip()))
+        except Exception as e:
+            print(f"Condition evaluation failed: {self.source} -> {e}")
+            return False
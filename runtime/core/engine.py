@@ -1,30 +1,93 @@
-import time
+import functools
+import queue
 import threading
-from concurrent.futures import ThreadPoolExecutor, wait
-from typing import Dict, Any, Set
-from jinja2 import Template
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Set, Tuple
 
 from ..parser.dsl_parser import WorkflowGraph
 from ..memory.memory import GlobalMemory
-from ..nodes import create_node
+from ..memory.result_cache import ResultCache
+from ..memory.memo import MemoStore, content_hash, node_key
+from ..nodes import create_node, get_node_class
+from ..nodes.simple import BaseNode, EventCallback
+from .process_pool import get_process_pool
+from .resilience import node_policy, run_with_policy
+from .scheduler import DependencyTracker
+from .trace import RunTrace
+
+class _Speculation:
+    """A speculative node's run, held until its condition and dependencies decide it."""
+
+    __slots__ = ("handle", "done", "result", "error", "commit")
+
+    def __init__(self):
+        self.handle = None  # Future or asyncio.Task, for cancellation
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.commit = False  # ready and condition true: complete when done
 
 class WorkflowEngine:
-    def __init__(self, graph: WorkflowGraph, global_memory: GlobalMemory):
+    """
+    `on_event(event, node_id, data)` is an optional callback for callers that
+    want progress as it happens. Events: "node_started" (resolved inputs),
+    "node_completed" (result), "node_skipped" (reason), "node_failed" (error)
+    and "token" (a partial LLM output from a streaming node, emitted from the
+    thread running the node).
+
+    `result_cache` (a ResultCache) serves repeated calls of cacheable nodes.
+    `memo` (a MemoStore shared across runs) reuses outputs of pure nodes
+    whose config and upstream outputs are unchanged.
+    `trace` (a RunTrace) records when each node became ready, was
+    submitted, started and finished.
+
+    A condition is evaluated as soon as the nodes it reads have completed,
+    so a false one skips its node and the subtree it owns without waiting
+    for the node's other dependencies. Nodes marked `speculative: true`
+    start as soon as their inputs can be resolved; their result is
+    committed once they are ready and their condition holds, and cancelled
+    or discarded otherwise.
+
+    Nodes with `timeout`, `retry` or `hedge` settings run under
+    runtime/core/resilience.py. When a run fails, the nodes still running
+    are cancelled (see BaseNode.cancelled) instead of waited for.
+    """
+
+    def __init__(self, graph: WorkflowGraph, global_memory: GlobalMemory,
+                 on_event: Optional[EventCallback] = None, result_cache: Optional[ResultCache] = None,
+                 memo: Optional[MemoStore] = None, trace: Optional[RunTrace] = None):
         self.graph = graph
         self.memory = global_memory
+        self.on_event = on_event
+        self.result_cache = result_cache
+        self._cache_keys: Dict[str, Tuple[str, Optional[float]]] = {}  # node_id -> (cache key, ttl)
+        self.memo = memo
+        self._memo_keys: Dict[str, str] = {}  # node_id -> memo key of the pending execution
+        self._value_hashes: Dict[Tuple[str, Any], Optional[str]] = {}  # (key, field) -> content hash, this run
         self.completed_nodes: Set[str] = set()
         self.skipped_nodes: Set[str] = set()
         self.lock = threading.Lock()
+        self.trace = trace
+        self._speculations: Dict[str, _Speculation] = {}
+        self._running: Dict[str, BaseNode] = {}  # submitted, not finished; cancelled on failure
+        self._process_futures: Dict[str, Future] = {}  # process-pool nodes among them
 
-    def _resolve_inputs(self, inputs_config: Dict[str, Any]) -> Dict[str, Any]:
+    def _emit(self, event: str, node_id: str, data: Any = None):
+        if self.on_event:
+            self.on_event(event, node_id, data)
+
+    def _resolve_inputs(self, inputs_config: Dict[str, Any], node_id: str = None) -> Dict[str, Any]:
         resolved = {}
-        context = self.memory.to_dict()
-        
+        # Only expose the keys the node's templates reference; falls back to
+        # a full (O(1), copy-free) snapshot when they are unknown.
+        references = self.graph.references.get(node_id)
+        context = self.memory.view(references) if references is not None else self.memory.snapshot()
+
         for key, value in inputs_config.items():
             if isinstance(value, str) and "{{" in value:
-                # Simple Jinja2 templating
+                # Jinja2 templating, compiled once per workflow
                 try:
-                    template = Template(value)
+                    template = self.graph.get_template(value)
                     resolved[key] = template.render(**context)
                 except Exception as e:
                     print(f"Error rendering template {value}: {e}")
@@ -36,107 +99,338 @@ class WorkflowEngine:
     def _check_condition(self, condition: str) -> bool:
         if not condition:
             return True
-        
-        context = self.memory.to_dict()
+
+        # Compiled once per workflow and evaluated directly against memory,
+        # e.g. "{{ 'technical_issue' in intent_classifier.text }}"
+        return self.graph.get_condition(condition).evaluate(self.memory)
+
+    def _prepare_node(self, tracker: DependencyTracker, node_id: str,
+                      speculative: bool = False) -> Optional[Tuple[BaseNode, Dict[str, Any]]]:
+        """
+        Evaluate a ready node's condition and resolve its inputs. Returns
+        None when there is nothing to submit: the condition is false (node
+        marked skipped) or the result was served from the result cache.
+        A speculative start skips all three: the condition isn't decidable
+        yet, and the result isn't committed until it is.
+        """
+        node_config = self.graph.nodes[node_id]
+        node_type = node_config.get("type")
+
+        if not speculative:
+            # Check Condition
+            condition = node_config.get("condition")
+            if condition and not self._check_condition(condition):
+                self._skip_node(tracker, node_id)
+                return None
+
+            if self._reuse_memoized(tracker, node_id, node_type, node_config):
+                return None
+
+        # Resolve inputs just before execution
+        inputs = self._resolve_inputs(node_config.get("inputs", {}), node_id)
+
+        node_instance = create_node(node_id, node_type, node_config)
+        node_instance.on_event = self.on_event
+
+        if speculative:
+            self._speculations[node_id] = _Speculation()
+            print(f"Speculatively submitting node: {node_id}")
+        else:
+            if self._serve_from_cache(tracker, node_instance, node_type, inputs):
+                return None
+            print(f"Submitting node: {node_id}")
+        self._emit("node_started", node_id, inputs)
+        return node_instance, inputs
+
+    def _skip_node(self, tracker: DependencyTracker, node_id: str):
+        with self.lock:
+            propagated = tracker.mark_skipped(node_id)
+        print(f"Node {node_id} SKIPPED (condition false).")
+        self._emit("node_skipped", node_id, "condition false")
+        for skipped_id in [node_id, *propagated]:
+            if skipped_id != node_id:
+                print(f"Node {skipped_id} SKIPPED (dependency skipped).")
+                self._emit("node_skipped", skipped_id, "dependency skipped")
+            self._discard_speculation(skipped_id)
+            if self.trace is not None:
+                self.trace.finished(skipped_id, "skipped")
+
+    def _decide_conditions(self, tracker: DependencyTracker, node_ids):
+        # Conditions whose inputs completed, on nodes still waiting for
+        # other dependencies: a false one skips the node's subtree right away
+        for node_id in node_ids:
+            if not tracker.is_skipped(node_id) and not self._check_condition(self.graph.nodes[node_id]["condition"]):
+                self._skip_node(tracker, node_id)
+
+    def _discard_speculation(self, node_id: str):
+        speculation = self._speculations.pop(node_id, None)
+        if speculation is None:
+            return
+        if not speculation.done and speculation.handle is not None:
+            # Cancels asyncio tasks and queued threads; a running thread is
+            # asked to stop and its result ignored when it arrives
+            speculation.handle.cancel()
+            node = self._running.get(node_id)
+            if node is not None:
+                node.cancel()
+        print(f"Node {node_id} speculative run discarded.")
+
+    def _commit_speculation(self, tracker: DependencyTracker, node_id: str):
+        # Called when the speculated node becomes ready, and again when its
+        # run finishes if it was still running then
+        speculation = self._speculations[node_id]
+        if not speculation.commit:
+            condition = self.graph.nodes[node_id].get("condition")
+            if condition and not self._check_condition(condition):
+                self._skip_node(tracker, node_id)
+                return
+            speculation.commit = True
+        if not speculation.done:
+            return
+
+        del self._speculations[node_id]
+        if speculation.error is not None:
+            print(f"Node {node_id} failed: {speculation.error}")
+            self._emit("node_failed", node_id, str(speculation.error))
+            raise speculation.error
+        print(f"Node {node_id} speculative result committed.")
+        self._complete_node(tracker, node_id, speculation.result)
+
+    def _speculation_done(self, tracker: DependencyTracker, node_id: str, future) -> bool:
+        """Handle a finished speculative run; False for ordinary nodes."""
+        speculation = self._speculations.get(node_id)
+        if speculation is None:
+            return tracker.is_skipped(node_id)  # discarded
+        speculation.done = True
         try:
-            # Use Jinja2 to render the condition string first
-            # e.g. "{{ intent_classifier.category == 'technical_issue' }}" -> "True" or "False"
-            template = Template(condition)
-            rendered = template.render(**context)
-            
-            # Python's eval to check boolean
-            return eval(rendered)
+            speculation.result = future.result()
         except Exception as e:
-            print(f"Condition evaluation failed: {condition} -> {e}")
+            speculation.error = e
+        if speculation.commit:
+            self._commit_speculation(tracker, node_id)
+        return True
+
+    def _serve_from_cache(self, tracker: DependencyTracker, node: BaseNode, node_type: str, inputs: Dict[str, Any]) -> bool:
+        # `cache: true | false | {ttl: seconds}` in the DSL overrides the
+        # node type's default (BaseNode.cacheable)
+        if self.result_cache is None:
+            return False
+        setting = node.config.get("cache", node.cacheable)
+        if not setting:
+            return False
+
+        key = self.result_cache.make_key(node_type, inputs)
+        hit, result = self.result_cache.get(key, node.node_id)
+        if not hit:
+            ttl = setting.get("ttl") if isinstance(setting, dict) else None
+            self._cache_keys[node.node_id] = (key, ttl)
+            return False
+
+        print(f"Node {node.node_id} served from cache.")
+        if self.trace is not None:
+            self.trace.finished(node.node_id, "cached")
+        if node.config.get("stream") and isinstance(result, dict) and result.get("text"):
+            node.emit("token", result["text"])
+        self._complete_node(tracker, node.node_id, result)
+        return True
+
+    def _value_hash(self, ref: Tuple[str, Any]) -> Optional[str]:
+        if ref not in self._value_hashes:
+            name, field = ref
+            value = self.memory.view([name]).get(name)
+            if field is not None and isinstance(value, dict):
+                value = value.get(field)
+            self._value_hashes[ref] = None if value is None else content_hash(value)
+        return self._value_hashes[ref]
+
+    def _reuse_memoized(self, tracker: DependencyTracker, node_id: str, node_type: str, node_config: Dict[str, Any]) -> bool:
+        if self.memo is None:
+            return False
+        if not node_config.get("memoize", get_node_class(node_type).pure):
             return False
+        references = self.graph.field_references.get(node_id)
+        if references is None:
+            return False  # can't tell what the node reads
+
+        key = node_key(node_config, [(repr(ref), self._value_hash(ref)) for ref in references])
+        entry = self.memo.get(key)
+        if entry is None:
+            self._memo_keys[node_id] = key
+            return False
+
+        result, output_hash = entry
+        self._value_hashes[(node_id, None)] = output_hash
+        print(f"Node {node_id} reused (config and inputs unchanged).")
+        if self.trace is not None:
+            self.trace.finished(node_id, "memoized")
+        self._complete_node(tracker, node_id, result)
+        return True
+
+    def _complete_node(self, tracker: DependencyTracker, node_id: str, result: Any):
+        # A degraded result (e.g. an LLM node's mock fallback during an
+        # outage) is used for this run but never stored for later ones
+        degraded = isinstance(result, dict) and result.get("degraded")
+
+        memo_key = self._memo_keys.pop(node_id, None)
+        if memo_key is not None and not degraded:
+            self._value_hashes[(node_id, None)] = self.memo.set(memo_key, result)
+
+        cache_entry = self._cache_keys.pop(node_id, None)
+        if cache_entry is not None and not degraded:
+            key, ttl = cache_entry
+            self.result_cache.set(key, result, ttl)
+
+        self.memory.set(node_id, result)
+        with self.lock:
+            decidable = tracker.mark_completed(node_id)
+        print(f"Node {node_id} completed.")
+        self._emit("node_completed", node_id, result)
+        self._decide_conditions(tracker, decidable)
+
+    def _is_inline(self, node: BaseNode) -> bool:
+        # Timeouts, retries and hedges need a thread to supervise them
+        return node.config.get("inline", node.inline) and node_policy(node, self.graph.workflow_id) is None
+
+    def _runner(self, node: BaseNode):
+        policy = node_policy(node, self.graph.workflow_id)
+        return node.run if policy is None else functools.partial(run_with_policy, node, policy)
+
+    def _cancel_running(self):
+        for node in self._running.values():
+            node.cancel()
+        self._running.clear()
+        # Process-pool tasks still waiting for a worker never start
+        for future in self._process_futures.values():
+            future.cancel()
+        self._process_futures.clear()
+
+    def _in_process(self, node: BaseNode) -> bool:
+        executor = node.config.get("executor") or self.graph.executors.get(node.config.get("type")) or node.executor
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Node {node.node_id}: unknown executor '{executor}'")
+        return executor == "process"
+
+    def _run_inline(self, tracker: DependencyTracker, node: BaseNode, inputs: Dict[str, Any]):
+        # Runs on the scheduler thread. Successors it makes ready are popped
+        # by the same submit loop, so a chain of inline nodes (router ->
+        # format -> print) completes in one scheduler step.
+        run = node.run if self.trace is None else self.trace.wrap(node.node_id, node.run)
+        try:
+            result = run(inputs)
+        except Exception as e:
+            print(f"Node {node.node_id} failed: {e}")
+            self._emit("node_failed", node.node_id, str(e))
+            raise e
+        finally:
+            tracker.ready.release(node.node_id)
+        self._complete_node(tracker, node.node_id, result)
+
+    def _start_tracking(self, backlog: int = 0) -> DependencyTracker:
+        if self.trace is not None:
+            self.trace.begin(self.graph)
+        tracker = DependencyTracker(self.graph, self.trace, backlog)
+        self.completed_nodes = tracker.completed
+        self.skipped_nodes = tracker.skipped
+        self._decide_conditions(tracker, tracker.decidable)
+        return tracker
 
     def run(self):
-        nodes_to_run = set(self.graph.nodes.keys())
-        
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {}
-            
-            while len(self.completed_nodes) + len(self.skipped_nodes) < len(nodes_to_run):
-                # Find ready nodes
-                ready_nodes = []
-                nodes_to_skip = []
-
-                with self.lock:
-                    for node_id in nodes_to_run:
-                        if node_id in self.completed_nodes or node_id in self.skipped_nodes:
-                            continue
-                        if node_id in futures:
-                            continue
-                        
-                        deps = self.graph.dependencies.get(node_id, set())
-                        
-                        # Check if dependencies are met (either completed or skipped)
-                        # If any dependency is SKIPPED, this node should also be SKIPPED (propagation)
-                        # UNLESS we want to support "join" logic where only one branch is needed.
-                        # For now, let's assume strict dependency: if dep is skipped, I am skipped.
-                        
-                        deps_completed = deps.issubset(self.completed_nodes)
-                        deps_skipped = deps.issubset(self.skipped_nodes)
-                        deps_all_finished = deps.issubset(self.completed_nodes.union(self.skipped_nodes))
-
-                        if deps_all_finished:
-                            if deps and deps_skipped:
-                                # All dependencies skipped -> Propagate skip
-                                nodes_to_skip.append(node_id)
-                            else:
-                                # At least one dependency completed (and others skipped) OR No dependencies -> Run
-                                ready_nodes.append(node_id)
-                
-                # Process skipped nodes immediately
-                if nodes_to_skip:
-                    with self.lock:
-                        for node_id in nodes_to_skip:
-                            self.skipped_nodes.add(node_id)
-                            print(f"Node {node_id} SKIPPED (dependency skipped).")
-                    continue
-
-                if not ready_nodes and not futures and (len(self.completed_nodes) + len(self.skipped_nodes) < len(nodes_to_run)):
+        # Each resource class gets its own pool, sized to its cap, so a
+        # saturated class (e.g. slow searches) can't take the threads other
+        # classes need. The pool enforces the cap, so the ready queue hands
+        # out one extra node per slot: a worker that finishes a node picks
+        # up the next one without waiting for the scheduler thread.
+        tracker = self._start_tracking(backlog=1)
+
+        # Worker threads report back through this queue, so the scheduler
+        # sleeps until a node actually finishes instead of polling.
+        done_queue: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        in_flight = 0
+
+        pools: Dict[str, ThreadPoolExecutor] = {}
+        try:
+            while not tracker.is_finished():
+                # Submit everything that became ready
+                # Highest critical-path node first, within resource class caps
+                while True:
+                    node_id = tracker.ready.pop()
+                    if node_id is None:
+                        break
+                    action = tracker.dispatch(node_id)
+                    if action == "commit":
+                        self._commit_speculation(tracker, node_id)
+                    prepared = self._prepare_node(tracker, node_id, action == "speculate") if action in ("run", "speculate") else None
+                    if prepared is None:
+                        tracker.ready.release(node_id)
+                        continue
+
+                    node_instance, inputs = prepared
+                    trace = self.trace
+                    if trace is not None:
+                        trace.submitted(node_id)
+                    if self._in_process(node_instance):
+                        future = get_process_pool().submit(node_instance, inputs)
+                        self._process_futures[node_id] = future
+                        if trace is not None:
+                            trace.started(node_id, "process-pool")
+                            future.add_done_callback(lambda f, node_id=node_id: trace.finished(
+                                node_id, "failed" if f.cancelled() or f.exception() else "completed"))
+                    elif self._is_inline(node_instance) and action == "run":
+                        self._run_inline(tracker, node_instance, inputs)
+                        continue
+                    else:
+                        run = self._runner(node_instance)
+                        if trace is not None:
+                            run = trace.wrap(node_id, run)
+                        resource = tracker.ready.resource_of[node_id]
+                        pool = pools.get(resource)
+                        if pool is None:
+                            pool = pools[resource] = ThreadPoolExecutor(
+                                max_workers=tracker.ready.limits[resource], thread_name_prefix=resource)
+                        future = pool.submit(run, inputs)
+                    self._running[node_id] = node_instance
+                    if action == "speculate":
+                        self._speculations[node_id].handle = future
+                    future.add_done_callback(lambda f, node_id=node_id: done_queue.put((node_id, f)))
+                    in_flight += 1
+
+                if tracker.is_finished():
+                    break
+
+                if not in_flight:
                     raise RuntimeError("Deadlock detected! Cycle in graph or missing dependencies.")
 
-                # Submit ready nodes
-                for node_id in ready_nodes:
-                    node_config = self.graph.nodes[node_id]
-                    
-                    # Check Condition
-                    condition = node_config.get("condition")
-                    if condition and not self._check_condition(condition):
-                        with self.lock:
-                            self.skipped_nodes.add(node_id)
-                        print(f"Node {node_id} SKIPPED (condition false).")
+                # Block until the next node finishes, then take every other
+                # finished node too, so a burst of short nodes costs one
+                # scheduler wake-up instead of one per node
+                finished = [done_queue.get()]
+                while True:
+                    try:
+                        finished.append(done_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for node_id, future in finished:
+                    in_flight -= 1
+                    tracker.ready.release(node_id)
+                    self._running.pop(node_id, None)
+                    self._process_futures.pop(node_id, None)
+                    if self._speculation_done(tracker, node_id, future):
                         continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Node {node_id} failed: {e}")
+                        self._emit("node_failed", node_id, str(e))
+                        raise e
 
-                    print(f"Submitting node: {node_id}")
-                    node_type = node_config.get("type")
-                    
-                    # Resolve inputs just before execution
-                    inputs = self._resolve_inputs(node_config.get("inputs", {}))
-                    
-                    node_instance = create_node(node_id, node_type, node_config)
-                    future = executor.submit(node_instance.run, inputs)
-                    futures[node_id] = future
-
-                # Wait for at least one to finish
-                if futures:
-                    done, _ = wait(list(futures.values()), return_when="FIRST_COMPLETED")
-                    
-                    for node_id, future in list(futures.items()):
-                        if future in done:
-                            try:
-                                result = future.result()
-                                self.memory.set(node_id, result)
-                                with self.lock:
-                                    self.completed_nodes.add(node_id)
-                                del futures[node_id]
-                                print(f"Node {node_id} completed.")
-                            except Exception as e:
-                                print(f"Node {node_id} failed: {e}")
-                                raise e
-                else:
-                    time.sleep(0.1)
+                    self._complete_node(tracker, node_id, result)
+        finally:
+            # A failed run doesn't wait for its in-flight nodes: they are
+            # asked to stop, and queued ones never start
+            self._cancel_running()
+            for pool in pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
 
+        if self.trace is not None:
+            self.trace.end()
         print("Workflow execution completed.")
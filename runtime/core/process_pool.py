@@ -0,0 +1,171 @@
+import functools
+import importlib
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Deque, Optional, Tuple, Type
+
+from ..nodes.simple import BaseNode
+
+# Pickled payloads at least this big travel through shared memory instead
+# of the pool's result pipe
+SHM_THRESHOLD = int(os.getenv("PROCESS_SHM_THRESHOLD", str(1 << 20)))
+
+# ("inline", pickled bytes) or ("shm", segment name, size)
+Payload = Tuple[Any, ...]
+
+def _pack(value: Any) -> Payload:
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) < SHM_THRESHOLD:
+        return ("inline", data)
+    shm = SharedMemory(create=True, size=len(data))
+    shm.buf[:len(data)] = data
+    shm.close()  # the receiver unlinks it
+    return ("shm", shm.name, len(data))
+
+def _unpack(payload: Payload, unlink: bool) -> Any:
+    if payload[0] == "inline":
+        return pickle.loads(payload[1])
+    _, name, size = payload
+    shm = SharedMemory(name=name)
+    try:
+        with shm.buf[:size] as view:
+            return pickle.loads(view)
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+def _release(payload: Payload):
+    if payload[0] == "shm":
+        shm = SharedMemory(name=payload[1])
+        shm.close()
+        shm.unlink()
+
+# The node registry is lazy; workers import the built-in node modules up front
+_PRELOAD = ["runtime.nodes.simple", "runtime.nodes.llm"]
+
+def _warm_worker():
+    # Import every node module once per worker, not once per task
+    for module in _PRELOAD:
+        importlib.import_module(module)
+
+def _ping() -> int:
+    return os.getpid()
+
+def _run_node(node_cls: Type[BaseNode], node_id: str, config: dict, inputs: Payload) -> Payload:
+    # Runs in a worker process. The parent owns (and unlinks) the inputs
+    # segment, the result segment is handed over to the parent.
+    node = node_cls(node_id, config)
+    return _pack(node.run(_unpack(inputs, unlink=False)))
+
+class NodeProcessPool:
+    """
+    Warm pool of worker processes for CPU-bound nodes, which threads can't
+    run in parallel under the GIL. Workers are started (and have imported
+    the runtime) before the first node is submitted, and live for the whole
+    process, so every run, chat turn and batch row reuses them.
+
+    Nodes are sent as (class, node_id, config): the engine's event callback
+    stays in the parent, so process nodes don't emit events of their own.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # forkserver: workers never fork a parent that already runs threads
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            context.set_forkserver_preload(_PRELOAD)
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context, initializer=_warm_worker)
+        for future in [self._executor.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+        # Tasks wait here, not in the executor's call queue, until a worker
+        # is free, so a task cancelled while it waits never takes a worker
+        self._waiting: Deque[Tuple[Future, tuple, Payload]] = deque()
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def submit(self, node: BaseNode, inputs: dict) -> Future:
+        """
+        Run `node.run(inputs)` in a worker; the future resolves to its
+        result. It can be cancelled until a worker picks the task up.
+        """
+        result: Future = Future()
+        with self._lock:
+            self._waiting.append((result, (type(node), node.node_id, node.config), _pack(inputs)))
+        self._dispatch()
+        return result
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._busy >= self.max_workers or not self._waiting:
+                    return
+                result, task, packed = self._waiting.popleft()
+                started = result.set_running_or_notify_cancel()  # False: cancelled while waiting
+                if started:
+                    self._busy += 1
+            if not started:
+                _release(packed)
+                continue
+            try:
+                future = self._executor.submit(_run_node, *task, packed)
+            except BaseException as e:  # pool shut down
+                self._finished(result, packed, e)
+                continue
+            future.add_done_callback(functools.partial(self._on_done, result, packed))
+
+    def _on_done(self, result: Future, packed: Payload, future: Future):
+        try:
+            value = _unpack(future.result(), unlink=True)
+        except BaseException as e:
+            self._finished(result, packed, e)
+        else:
+            self._finished(result, packed, None, value)
+
+    def _finished(self, result: Future, packed: Payload, error: Optional[BaseException], value: Any = None):
+        _release(packed)
+        if error is not None:
+            result.set_exception(error)
+        else:
+            result.set_result(value)
+        with self._lock:
+            self._busy -= 1
+        self._dispatch()
+
+    def shutdown(self):
+        with self._lock:
+            waiting, self._waiting = list(self._waiting), deque()
+        for result, _, packed in waiting:
+            result.cancel()
+            _release(packed)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+_pool: Optional[NodeProcessPool] = None
+_pool_lock = threading.Lock()
+_pool_size = int(os.getenv("PROCESS_POOL_WORKERS", "0")) or None
+
+def configure_process_pool(max_workers: Optional[int] = None):
+    """Set the worker count; takes effect the next time the pool is started."""
+    global _pool_size
+    shutdown_process_pool()
+    _pool_size = max_workers
+
+def get_process_pool() -> NodeProcessPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = NodeProcessPool(_pool_size)
+        return _pool
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
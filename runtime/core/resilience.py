@@ -0,0 +1,286 @@
+"""
+Per-node timeouts, retries and hedged requests, set in the DSL:
+
+    timeout: 30                     # seconds per attempt
+    retry: 2                        # extra attempts after a failure, or {times: 2, backoff: 0.5}
+    hedge: true                     # opt-in, for idempotent nodes (llm, mock_search); or {after: 0.8}
+
+A hedged attempt that hasn't answered after the p95 of the node's recent
+latencies (or `hedge.after` seconds) gets a duplicate; the first response
+wins and the other attempt is cancelled, unless it is degraded (an LLM
+node's mock fallback), which only wins if nothing else is still running.
+Each attempt runs on its own node instance (BaseNode.fork), so
+cancelling one leaves the others alone.
+For a streaming node the first attempt to emit a token wins outright: only
+its tokens reach the caller, and it isn't retried once they have.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Deque, Dict, NamedTuple, Optional
+
+from ..nodes.simple import BaseNode, NodeCancelled
+
+DEFAULT_BACKOFF = 0.5  # seconds before the first retry, doubled after each
+# Hedging starts once a node has this many recorded latencies, and never
+# fires sooner than HEDGE_MIN_DELAY (instant nodes would hedge on noise)
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+# How often a supervising thread checks whether its node was cancelled
+_CANCEL_POLL = 0.1
+
+class NodeTimeout(TimeoutError):
+    """A node attempt ran past its `timeout`."""
+
+class NodePolicy(NamedTuple):
+    timeout: Optional[float]
+    retries: int
+    backoff: float
+    hedge: bool
+    hedge_after: Optional[float]  # None: p95 of recent latencies
+    key: str  # the node's latency window, see LatencyStats
+
+def node_policy(node: BaseNode, workflow_id: str) -> Optional[NodePolicy]:
+    """The node's timeout / retry / hedge settings; None when it has none."""
+    config = node.config
+    timeout = config.get("timeout")
+    retry = config.get("retry") or 0
+    # Every hedge is a second paid call, so it's opt-in; nodes that aren't
+    # idempotent (a duplicate print prints twice) are never hedged
+    hedge = config.get("hedge", False) if node.idempotent else False
+    if timeout is None and not retry and not hedge:
+        return None
+    if isinstance(retry, dict):
+        retries, backoff = int(retry.get("times", 1)), float(retry.get("backoff", DEFAULT_BACKOFF))
+    else:
+        retries, backoff = int(retry), DEFAULT_BACKOFF
+    hedge_after = hedge.get("after") if isinstance(hedge, dict) else None
+    return NodePolicy(
+        timeout=float(timeout) if timeout is not None else None,
+        retries=retries,
+        backoff=backoff,
+        hedge=bool(hedge),
+        hedge_after=float(hedge_after) if hedge_after is not None else None,
+        # Workflows served from one process may reuse node ids
+        key=f"{workflow_id}:{config.get('type')}:{node.node_id}",
+    )
+
+class LatencyStats:
+    """Recent attempt latencies per workflow node, shared by every run in the process."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counters = {"hedged": 0, "hedge_wins": 0, "timeouts": 0, "retries": 0}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+_latency = LatencyStats()
+
+def get_latency_stats() -> LatencyStats:
+    return _latency
+
+def _hedge_delay(key: str, policy: NodePolicy) -> Optional[float]:
+    if not policy.hedge:
+        return None
+    if policy.hedge_after is not None:
+        return policy.hedge_after
+    p95 = _latency.percentile(key, HEDGE_PERCENTILE)
+    return None if p95 is None else max(p95, HEDGE_MIN_DELAY)
+
+def _is_degraded(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("degraded"))
+
+def _next_wake(now: float, *deadlines: Optional[float]) -> Optional[float]:
+    pending = [t for t in deadlines if t is not None]
+    return max(min(pending) - now, 0.0) if pending else None
+
+def _spawn(fn, *args) -> Future:
+    # Attempts run on daemon threads: one stuck in a call that can't be
+    # interrupted (a blocking HTTP request) doesn't hold up interpreter exit
+    future: Future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name="node-attempt", daemon=True).start()
+    return future
+
+def _retry_delay(node: BaseNode, policy: NodePolicy, attempt: int, error: Exception) -> float:
+    delay = policy.backoff * 2 ** attempt
+    _latency.count("retries")
+    print(f"[{node.node_id}] Attempt {attempt + 1} failed ({error}); retrying in {delay:.2f}s")
+    return delay
+
+def run_with_policy(node: BaseNode, policy: NodePolicy, inputs: Dict[str, Any]) -> Any:
+    """Run `node` under `policy` on the calling thread (see WorkflowEngine)."""
+    for attempt in range(policy.retries + 1):
+        try:
+            return _attempt(node, policy, inputs, last=attempt == policy.retries)
+        except NodeCancelled:
+            raise
+        except Exception as e:
+            if attempt == policy.retries or node.cancelled.is_set() or node.stream_owner is not None:
+                raise
+            node.wait(_retry_delay(node, policy, attempt, e))
+
+def _attempt(node: BaseNode, policy: NodePolicy, inputs: Dict[str, Any], last: bool) -> Any:
+    key = policy.key
+    hedge_delay = _hedge_delay(key, policy)
+    start = time.perf_counter()
+
+    def fork() -> BaseNode:
+        attempt = node.fork()
+        attempt.retrying = not last
+        return attempt
+
+    if policy.timeout is None and hedge_delay is None:
+        result = fork().run(inputs)
+        if not _is_degraded(result):
+            _latency.record(key, time.perf_counter() - start)
+        return result
+
+    attempts: Dict[Future, BaseNode] = {}
+    primary = fork()
+    attempts[_spawn(primary.run, inputs)] = primary
+    deadline = start + policy.timeout if policy.timeout is not None else None
+    hedge_at = start + hedge_delay if hedge_delay is not None else None
+    fallback = None  # a degraded result, kept in case nothing better arrives
+    try:
+        while True:
+            wake = _next_wake(time.perf_counter(), deadline, hedge_at)
+            done, _ = wait(attempts, timeout=min(wake, _CANCEL_POLL) if wake is not None else _CANCEL_POLL,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = attempts.pop(future)
+                error = future.exception()
+                if node.stream_owner not in (None, attempt):
+                    continue  # lost the stream; the owner decides
+                if error is None and _is_degraded(future.result()):
+                    # Loses to any attempt still running, and a fast fallback
+                    # isn't a latency sample of the real call
+                    fallback = future
+                elif error is None:
+                    _latency.record(key, time.perf_counter() - start)
+                    if attempt is not primary:
+                        _latency.count("hedge_wins")
+                    return future.result()
+                # A failed attempt only decides the outcome if it was the last one running
+                if not attempts:
+                    return (fallback or future).result()
+            node.check_cancelled()
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                _latency.count("timeouts")
+                raise NodeTimeout(f"Node {node.node_id} timed out after {policy.timeout}s")
+            if node.stream_owner is not None:
+                hedge_at = None  # the stream has started, too late to hedge
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                _latency.count("hedged")
+                print(f"[{node.node_id}] No response after {hedge_delay * 1000:.0f}ms, sending a hedged request")
+                hedge = fork()
+                attempts[_spawn(hedge.run, inputs)] = hedge
+    finally:
+        # Losers and timed-out attempts
+        for attempt in attempts.values():
+            attempt.cancel()
+
+async def arun_with_policy(node: BaseNode, policy: NodePolicy, inputs: Dict[str, Any]) -> Any:
+    """Async counterpart of run_with_policy (see AsyncWorkflowEngine)."""
+    for attempt in range(policy.retries + 1):
+        try:
+            return await _aattempt(node, policy, inputs, last=attempt == policy.retries)
+        except NodeCancelled:
+            raise
+        except Exception as e:
+            if attempt == policy.retries or node.cancelled.is_set() or node.stream_owner is not None:
+                raise
+            await asyncio.sleep(_retry_delay(node, policy, attempt, e))
+
+async def _aattempt(node: BaseNode, policy: NodePolicy, inputs: Dict[str, Any], last: bool) -> Any:
+    key = policy.key
+    hedge_delay = _hedge_delay(key, policy)
+    start = time.perf_counter()
+
+    def fork() -> BaseNode:
+        attempt = node.fork()
+        attempt.retrying = not last
+        return attempt
+
+    if policy.timeout is None and hedge_delay is None:
+        result = await fork().arun(inputs)
+        if not _is_degraded(result):
+            _latency.record(key, time.perf_counter() - start)
+        return result
+
+    attempts: Dict[asyncio.Task, BaseNode] = {}
+    primary = fork()
+    attempts[asyncio.ensure_future(primary.arun(inputs))] = primary
+    deadline = start + policy.timeout if policy.timeout is not None else None
+    hedge_at = start + hedge_delay if hedge_delay is not None else None
+    fallback = None  # a degraded result, kept in case nothing better arrives
+    try:
+        while True:
+            wake = _next_wake(time.perf_counter(), deadline, hedge_at)
+            done, _ = await asyncio.wait(attempts, timeout=wake, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                attempt = attempts.pop(task)
+                error = task.exception()
+                if node.stream_owner not in (None, attempt):
+                    continue
+                if error is None and _is_degraded(task.result()):
+                    fallback = task
+                elif error is None:
+                    _latency.record(key, time.perf_counter() - start)
+                    if attempt is not primary:
+                        _latency.count("hedge_wins")
+                    return task.result()
+                if not attempts:
+                    return (fallback or task).result()
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                _latency.count("timeouts")
+                raise NodeTimeout(f"Node {node.node_id} timed out after {policy.timeout}s")
+            if node.stream_owner is not None:
+                hedge_at = None  # the stream has started, too late to hedge
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                _latency.count("hedged")
+                print(f"[{node.node_id}] No response after {hedge_delay * 1000:.0f}ms, sending a hedged request")
+                hedge = fork()
+                attempts[asyncio.ensure_future(hedge.arun(inputs))] = hedge
+    finally:
+        # Losers, timed-out attempts, or all of them when the node's task is cancelled
+        for task, attempt in attempts.items():
+            task.cancel()
+            attempt.cancel()
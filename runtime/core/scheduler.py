@@ -0,0 +1,214 @@
+import heapq
+import weakref
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from ..nodes import NODE_CLASSES
+from ..nodes.simple import BaseNode
+from ..parser.dsl_parser import WorkflowGraph
+
+if TYPE_CHECKING:
+    from .trace import RunTrace
+
+# Concurrency caps for resource classes the DSL's `resources:` doesn't set
+DEFAULT_RESOURCE_LIMITS = {"default": 10, "io": 10, "llm": 8}
+
+def resource_class(node_config: Dict) -> str:
+    # `resource:` in the DSL overrides the node type's BaseNode.resource_class
+    # (unknown types fail later, when the node is created)
+    return node_config.get("resource") or NODE_CLASSES.get(node_config.get("type"), BaseNode).resource_class
+
+def resource_limits(graph: WorkflowGraph) -> Dict[str, int]:
+    """Concurrency cap of every resource class the graph's nodes use."""
+    limits = {}
+    for config in graph.nodes.values():
+        name = resource_class(config)
+        if name not in limits:
+            limit = graph.resources.get(name, DEFAULT_RESOURCE_LIMITS.get(name, DEFAULT_RESOURCE_LIMITS["default"]))
+            if isinstance(limit, dict):
+                limit = limit.get("max_concurrency", DEFAULT_RESOURCE_LIMITS["default"])
+            if int(limit) < 1:
+                raise ValueError(f"Resource class '{name}' needs a concurrency of at least 1, got {limit}")
+            limits[name] = int(limit)
+    return limits
+
+# graph -> (resource limits, node_id -> resource class), built on the first run
+_resource_tables: "weakref.WeakKeyDictionary[WorkflowGraph, Tuple[Dict[str, int], Dict[str, str]]]" = weakref.WeakKeyDictionary()
+
+def resource_table(graph: WorkflowGraph) -> Tuple[Dict[str, int], Dict[str, str]]:
+    table = _resource_tables.get(graph)
+    if table is None:
+        table = (resource_limits(graph), {node_id: resource_class(config) for node_id, config in graph.nodes.items()})
+        _resource_tables[graph] = table
+    return table
+
+class ReadyQueue:
+    """
+    Nodes whose dependencies are resolved, waiting for a slot in their
+    resource class. `pop` returns the ready node with the longest critical
+    path among the classes that still have a free slot, so slow nodes can
+    only exhaust their own class and the longest chain always starts first.
+    """
+
+    def __init__(self, graph: WorkflowGraph, trace: Optional["RunTrace"] = None, backlog: int = 0):
+        self.plan = graph.plan
+        self.trace = trace
+        self.limits, self.resource_of = resource_table(graph)  # shared, read-only
+        # Nodes a class may have handed out: its cap, plus `backlog` per slot
+        # for an executor that enforces the cap itself and queues the rest
+        self.slots = {name: limit * (1 + backlog) for name, limit in self.limits.items()}
+        self.in_use = {name: 0 for name in self.limits}
+        self._heaps: Dict[str, List[Tuple[int, int, str]]] = {name: [] for name in self.limits}
+        self._counter = 0  # FIFO among equal priorities
+
+    def push(self, node_id: str):
+        if self.trace is not None:
+            self.trace.ready(node_id)
+        self._counter += 1
+        heapq.heappush(self._heaps[self.resource_of[node_id]],
+                       (-self.plan.critical_path[self.plan.index[node_id]], self._counter, node_id))
+
+    def pop(self) -> Optional[str]:
+        """Take the best runnable node and one slot of its class; None if nothing can start."""
+        best = None
+        for name, heap in self._heaps.items():
+            if heap and self.in_use[name] < self.slots[name] and (best is None or heap[0] < self._heaps[best][0]):
+                best = name
+        if best is None:
+            return None
+        self.in_use[best] += 1
+        return heapq.heappop(self._heaps[best])[2]
+
+    def release(self, node_id: str):
+        self.in_use[self.resource_of[node_id]] -= 1
+
+    def __len__(self) -> int:
+        return sum(len(heap) for heap in self._heaps.values())
+
+# DependencyTracker._dispatched states
+_SPECULATED = 1
+_DISPATCHED = 2
+
+class DependencyTracker:
+    """
+    In-degree bookkeeping for a single workflow run.
+
+    Every node starts with a counter equal to its number of dependencies,
+    copied from the graph's ExecutionPlan. Finishing a node (completed or
+    skipped) only touches its direct successors, so a whole run costs
+    O(V + E) instead of rescanning the graph on every scheduler wake-up.
+
+    Two more counters let the engine act before a node is ready: a
+    condition becomes decidable once the nodes it reads completed (see
+    `mark_completed`), and a `speculative: true` node is pushed to the
+    ready queue once the nodes its inputs read completed, while its other
+    dependencies may still be running (see `dispatch`).
+    """
+
+    def __init__(self, graph: WorkflowGraph, trace: Optional["RunTrace"] = None, backlog: int = 0):
+        plan = graph.plan
+        self.node_ids = plan.node_ids
+        self.index = plan.index
+        self.successors = plan.successors  # shared, read-only
+        self.condition_watchers = plan.condition_watchers
+        self.start_watchers = plan.start_watchers
+        self.total = len(plan.node_ids)
+        self.completed: Set[str] = set()
+        self.skipped: Set[str] = set()
+        self.ready = ReadyQueue(graph, trace, backlog)
+
+        self.remaining: List[int] = list(plan.in_degrees)
+        self.completed_deps: List[int] = [0] * self.total
+        self.condition_remaining: List[int] = list(plan.condition_reads)
+        self.start_remaining: List[int] = list(plan.start_reads)
+        self._skipped: List[bool] = [False] * self.total
+        self._dispatched: List[int] = [0] * self.total
+        for i, degree in enumerate(plan.in_degrees):
+            if degree == 0 or self.start_remaining[i] == 0:
+                self.ready.push(plan.node_ids[i])
+        # Conditions that only read `inputs` can be decided before anything runs
+        self.decidable: List[str] = [
+            plan.node_ids[i] for i, degree in enumerate(plan.in_degrees)
+            if degree > 0 and plan.condition_reads[i] == 0 and graph.nodes[plan.node_ids[i]].get("condition")
+        ]
+
+    def is_finished(self) -> bool:
+        return len(self.completed) + len(self.skipped) >= self.total
+
+    def is_skipped(self, node_id: str) -> bool:
+        return self._skipped[self.index[node_id]]
+
+    def dispatch(self, node_id: str) -> Optional[str]:
+        """
+        What to do with a node popped from the ready queue: "run",
+        "speculate" (a speculative node whose other dependencies are still
+        running), "commit" (a speculated node that is now ready) or None
+        (skipped meanwhile, or already dispatched).
+        """
+        i = self.index[node_id]
+        if self._skipped[i]:
+            return None
+        if self.remaining[i] > 0:
+            if self._dispatched[i]:
+                return None
+            self._dispatched[i] = _SPECULATED
+            return "speculate"
+        previous = self._dispatched[i]
+        if previous == _DISPATCHED:
+            return None
+        self._dispatched[i] = _DISPATCHED
+        return "commit" if previous == _SPECULATED else "run"
+
+    def mark_completed(self, node_id: str) -> List[str]:
+        """
+        Complete a node. Returns the not-yet-ready nodes whose condition
+        only read completed nodes and can be decided now.
+        """
+        i = self.index[node_id]
+        self.completed.add(node_id)
+        for succ in self.successors[i]:
+            self.remaining[succ] -= 1
+            self.completed_deps[succ] += 1
+            if self.remaining[succ] == 0 and not self._skipped[succ]:
+                self.ready.push(self.node_ids[succ])
+        for succ in self.start_watchers[i]:
+            self.start_remaining[succ] -= 1
+            # Started early only if it isn't ready anyway
+            if self.start_remaining[succ] == 0 and self.remaining[succ] > 0 and not self._skipped[succ]:
+                self.ready.push(self.node_ids[succ])
+        decidable = []
+        for succ in self.condition_watchers[i]:
+            self.condition_remaining[succ] -= 1
+            if self.condition_remaining[succ] == 0 and self.remaining[succ] > 0 and not self._skipped[succ]:
+                decidable.append(self.node_ids[succ])
+        return decidable
+
+    def mark_skipped(self, node_id: str) -> List[str]:
+        """
+        Skip a node, possibly before all its dependencies finished, and
+        propagate the skip in one step through the subtree it exclusively
+        owns: every successor whose dependencies all ended up skipped.
+        Returns the propagated nodes.
+        """
+        propagated = []
+        stack = [self.index[node_id]]
+        self.skipped.add(node_id)
+        self._skipped[stack[0]] = True
+
+        while stack:
+            current = stack.pop()
+            for succ in self.successors[current]:
+                self.remaining[succ] -= 1
+                if self.remaining[succ] != 0 or self._skipped[succ]:
+                    continue
+                succ_id = self.node_ids[succ]
+                if self.completed_deps[succ] == 0:
+                    # All dependencies skipped -> propagate skip
+                    self.skipped.add(succ_id)
+                    self._skipped[succ] = True
+                    propagated.append(succ_id)
+                    stack.append(succ)
+                else:
+                    # At least one dependency completed (others skipped) -> run
+                    self.ready.push(succ_id)
+
+        return propagated
@@ -0,0 +1,71 @@
+import os
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Dict
+
+from jinja2 import Template
+from jinja2.sandbox import SandboxedEnvironment
+
+class TemplateCache:
+    """
+    Process-wide LRU of compiled Jinja2 templates.
+
+    All templates are compiled by one shared sandboxed Environment, so the
+    same source string is only compiled once no matter how many graphs,
+    runs or chat turns render it.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.env = SandboxedEnvironment()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._templates: "OrderedDict[str, Template]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: str) -> Template:
+        with self._lock:
+            template = self._templates.get(source)
+            if template is not None:
+                self._templates.move_to_end(source)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        # Compile outside the lock; a concurrent miss on the same source
+        # just compiles twice and the last one wins.
+        template = self.env.from_string(source)
+        self._put(source, template)
+        return template
+
+    def code(self, source: str) -> CodeType:
+        """Python bytecode of a template, so it can be stored (marshal) and reloaded without compiling."""
+        return self.env.compile(source)
+
+    def from_code(self, source: str, code: CodeType) -> Template:
+        template = self.env.template_class.from_code(self.env, code, self.env.make_globals(None))
+        self._put(source, template)
+        return template
+
+    def _put(self, source: str, template: Template):
+        with self._lock:
+            self._templates[source] = template
+            self._templates.move_to_end(source)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._templates),
+                "maxsize": self.maxsize,
+            }
+
+template_cache = TemplateCache(maxsize=int(os.getenv("TEMPLATE_CACHE_SIZE", "1024")))
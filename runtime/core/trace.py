@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+class NodeSpan:
+    """Timestamps (perf_counter seconds) of one node in a traced run."""
+
+    __slots__ = ("node_id", "resource", "ready", "submitted", "started", "finished", "thread", "status")
+
+    def __init__(self, node_id: str, resource: str):
+        self.node_id = node_id
+        self.resource = resource
+        self.ready: Optional[float] = None  # dependencies resolved, queued for a slot
+        self.submitted: Optional[float] = None  # handed to its executor
+        self.started: Optional[float] = None  # began running (worker thread, loop or scheduler)
+        self.finished: Optional[float] = None
+        self.thread: Optional[str] = None
+        self.status = "pending"  # completed, failed, skipped, cached, memoized
+
+class RunTrace:
+    """
+    Per-node timeline of one workflow run. Pass one to an engine
+    (`WorkflowEngine(..., trace=RunTrace())`); engines without a trace only
+    pay an `is None` check at each hook.
+
+    Nodes in the process pool are timed from the parent: their start is
+    when they were submitted and their thread is "process-pool".
+    """
+
+    def __init__(self):
+        self.spans: Dict[str, NodeSpan] = {}
+        self.limits: Dict[str, int] = {}
+        self.predecessors: Dict[str, List[str]] = {}
+        self.run_started: Optional[float] = None
+        self.run_finished: Optional[float] = None
+
+    def begin(self, graph):
+        from .scheduler import resource_table
+
+        plan = graph.plan
+        self.limits, resource_of = resource_table(graph)
+        self.spans = {node_id: NodeSpan(node_id, resource_of[node_id]) for node_id in plan.node_ids}
+        self.predecessors = {
+            node_id: [plan.node_ids[p] for p in plan.predecessors[i]] for i, node_id in enumerate(plan.node_ids)
+        }
+        self.run_started = time.perf_counter()
+
+    def end(self):
+        self.run_finished = time.perf_counter()
+
+    # Hooks, called by the scheduler and the engines
+
+    def ready(self, node_id: str):
+        self.spans[node_id].ready = time.perf_counter()
+
+    def submitted(self, node_id: str):
+        self.spans[node_id].submitted = time.perf_counter()
+
+    def started(self, node_id: str, thread: Optional[str] = None):
+        span = self.spans[node_id]
+        span.started = time.perf_counter()
+        span.thread = thread or threading.current_thread().name
+
+    def finished(self, node_id: str, status: str = "completed"):
+        span = self.spans[node_id]
+        span.finished = time.perf_counter()
+        span.status = status
+
+    def wrap(self, node_id: str, fn):
+        """`fn` timed from inside the thread that runs it."""
+        def traced(*args):
+            self.started(node_id)
+            try:
+                result = fn(*args)
+            except BaseException:
+                self.finished(node_id, "failed")
+                raise
+            self.finished(node_id)
+            return result
+        return traced
+
+    async def awrap(self, node_id: str, run, thread: Optional[str] = None):
+        self.started(node_id, thread)
+        try:
+            result = await run
+        except BaseException:
+            self.finished(node_id, "failed")
+            raise
+        self.finished(node_id)
+        return result
+
+    # Reports
+
+    def _executed(self) -> List[NodeSpan]:
+        return [s for s in self.spans.values() if s.started is not None and s.finished is not None]
+
+    def critical_path(self) -> List[NodeSpan]:
+        """
+        The chain that set the run's latency: from the last node to finish,
+        repeatedly step to the predecessor that finished last (the one it
+        was waiting on).
+        """
+        done = [s for s in self.spans.values() if s.finished is not None]
+        if not done:
+            return []
+        current = max(done, key=lambda s: s.finished)
+        path = [current]
+        while True:
+            preds = [self.spans[p] for p in self.predecessors[current.node_id] if self.spans[p].finished is not None]
+            if not preds:
+                break
+            current = max(preds, key=lambda s: s.finished)
+            path.append(current)
+        path.reverse()
+        return path
+
+    def summary(self) -> Dict[str, Any]:
+        makespan = (self.run_finished or time.perf_counter()) - self.run_started
+        executed = self._executed()
+        busy: Dict[str, float] = {name: 0.0 for name in self.limits}
+        for s in executed:
+            busy[s.resource] = busy.get(s.resource, 0.0) + (s.finished - s.started)
+        total_busy = sum(busy.values())
+
+        def node_times(s: NodeSpan) -> Dict[str, Any]:
+            return {
+                "node_id": s.node_id,
+                "status": s.status,
+                "queue_wait": (s.submitted - s.ready) if s.submitted is not None and s.ready is not None else 0.0,
+                "executor_wait": (s.started - s.submitted) if s.started is not None and s.submitted is not None else 0.0,
+                "execution": (s.finished - s.started) if s.started is not None and s.finished is not None else 0.0,
+            }
+
+        return {
+            "makespan": makespan,
+            "nodes": {s.node_id: s.status for s in self.spans.values()},
+            "critical_path": [node_times(s) for s in self.critical_path()],
+            # Average number of nodes executing at once
+            "parallelism": total_busy / makespan if makespan > 0 else 0.0,
+            "utilization": {
+                name: busy.get(name, 0.0) / (limit * makespan) if makespan > 0 else 0.0
+                for name, limit in self.limits.items()
+            },
+            "slowest_waits": sorted(
+                (node_times(s) for s in executed), key=lambda t: t["queue_wait"] + t["executor_wait"], reverse=True
+            )[:5],
+        }
+
+    def report(self) -> str:
+        summary = self.summary()
+        lines = [f"Trace: makespan {summary['makespan']:.3f}s, avg parallelism {summary['parallelism']:.2f}"]
+        path = summary["critical_path"]
+        if path:
+            chain = " -> ".join(
+                f"{t['node_id']} ({t['execution'] * 1000:.1f}ms"
+                + (f", waited {(t['queue_wait'] + t['executor_wait']) * 1000:.1f}ms" if t["queue_wait"] + t["executor_wait"] >= 0.0005 else "")
+                + ")"
+                for t in path
+            )
+            lines.append(f"  critical path: {chain}")
+        for name, used in summary["utilization"].items():
+            lines.append(f"  utilization [{name}]: {used:.0%} of {self.limits[name]} slots")
+        waits = [t for t in summary["slowest_waits"] if t["queue_wait"] + t["executor_wait"] >= 0.0005]
+        if waits:
+            lines.append("  longest waits: " + ", ".join(
+                f"{t['node_id']} {t['queue_wait'] * 1000:.1f}ms queued + {t['executor_wait'] * 1000:.1f}ms in executor"
+                for t in waits
+            ))
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome `trace_event` format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        tids: Dict[str, int] = {"scheduler": 0}
+        events: List[Dict[str, Any]] = []
+
+        def us(t: float) -> float:
+            return round((t - self.run_started) * 1e6, 3)
+
+        for s in self.spans.values():
+            if s.finished is None:
+                continue
+            if s.ready is not None and s.submitted is not None:
+                # Async events may overlap, unlike complete events on one thread
+                common = {"name": f"{s.node_id} queued", "cat": "queue", "id": s.node_id, "pid": pid, "tid": 0}
+                events.append({**common, "ph": "b", "ts": us(s.ready)})
+                events.append({**common, "ph": "e", "ts": us(s.started if s.started is not None else s.submitted)})
+            if s.started is None:
+                # Skipped, cached or memoized: an instant on the scheduler track
+                events.append({"name": s.node_id, "cat": s.status, "ph": "i", "s": "t", "pid": pid, "tid": 0,
+                               "ts": us(s.finished)})
+                continue
+            tid = tids.setdefault(s.thread, len(tids))
+            events.append({
+                "name": s.node_id, "cat": s.resource, "ph": "X", "pid": pid, "tid": tid,
+                "ts": us(s.started), "dur": round((s.finished - s.started) * 1e6, 3),
+                "args": {"status": s.status, "ready_us": us(s.ready) if s.ready is not None else None,
+                         "submitted_us": us(s.submitted) if s.submitted is not None else None},
+            })
+        for name, tid in tids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
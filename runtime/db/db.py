@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine, Column, String, Text, JSON
+import time
+from sqlalchemy import create_engine, inspect, text, Column, String, Text, JSON, Float, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base, sessionmaker
 import uuid
@@ -27,11 +28,23 @@ class WorkflowRun(Base):
     status = Column(String, default="RUNNING") # RUNNING, COMPLETED, FAILED
     global_memory = Column(JSON, default=dict)
 
+class NodeExecution(Base):
+    __tablename__ = "node_executions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    run_id = Column(String, nullable=False, index=True)
+    node_id = Column(String, nullable=False)
+    event = Column(String, nullable=False) # started, completed, skipped, failed
+    payload = Column(JSON, nullable=True) # inputs, result, skip reason or error
+    timestamp = Column(Float, nullable=False) # time.time() when the event happened
+
 class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=True)
+    summary = Column(Text, nullable=True) # rolling summary of messages[1..summarized_seq]
+    summarized_seq = Column(Integer, nullable=False, default=0)
     # created_at = Column(DateTime, default=datetime.datetime.utcnow) # Simplify for demo
 
 class Message(Base):
@@ -41,7 +54,49 @@ class Message(Base):
     conversation_id = Column(String, nullable=False)
     role = Column(String, nullable=False) # user, assistant
     content = Column(Text, nullable=False)
-    # created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    seq = Column(Integer, nullable=False) # position within the conversation, from 1
+    created_at = Column(Float, nullable=False, default=time.time)
+    tokens = Column(Integer, nullable=True) # counted once, on insert
+
+    # History reads are "last N of one conversation": an index range scan
+    __table_args__ = (Index("ix_messages_conversation_seq", "conversation_id", "seq", unique=True),)
+
+# Columns added after a table's first release: create_all() leaves existing
+# tables alone, so init_db() adds whichever of these are missing
+_ADDED_COLUMNS = {
+    "conversations": [("summary", "TEXT"), ("summarized_seq", "INTEGER NOT NULL DEFAULT 0")],
+    "messages": [("seq", "INTEGER"), ("created_at", "FLOAT"), ("tokens", "INTEGER")],  # tokens: counted on read when NULL
+}
+
+def _migrate(conn):
+    tables = inspect(conn).get_table_names()
+    added = set()
+    for table, columns in _ADDED_COLUMNS.items():
+        if table not in tables:
+            continue  # create_all() builds it with every column
+        existing = {c["name"] for c in inspect(conn).get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                added.add((table, name))
+    if ("messages", "seq") in added:
+        # Number old messages per conversation in insert order (rowid on
+        # SQLite, ctid on Postgres); created_at stays NULL, it was never recorded
+        order = "rowid" if conn.dialect.name == "sqlite" else "ctid"
+        rows = conn.execute(text(f"SELECT id, conversation_id FROM messages ORDER BY {order}"))
+        counters: dict = {}
+        updates = []
+        for message_id, conversation_id in rows:
+            counters[conversation_id] = counters.get(conversation_id, 0) + 1
+            updates.append({"id": message_id, "seq": counters[conversation_id]})
+        if updates:
+            conn.execute(text("UPDATE messages SET seq = :seq WHERE id = :id"), updates)
+        print(f"Migrated messages table: numbered {len(updates)} messages")
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        _migrate(conn)
+        Base.metadata.create_all(bind=conn)
+        # create_all() skips the indexes of tables that already existed
+        for index in Message.__table__.indexes:
+            index.create(conn, checkfirst=True)
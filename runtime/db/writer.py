@@ -0,0 +1,145 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import insert, update
+
+from .db import NodeExecution, SessionLocal, Workflow, WorkflowRun
+
+# Engine events recorded per node ("token" chunks are not)
+_NODE_EVENTS = {
+    "node_started": "started",
+    "node_completed": "completed",
+    "node_skipped": "skipped",
+    "node_failed": "failed",
+}
+
+_STOP = object()
+
+def _jsonable(value: Any) -> Any:
+    # Node results may hold objects JSON columns can't store
+    return json.loads(json.dumps(value, default=str))
+
+class PersistenceWriter:
+    """
+    Background writer for workflow, run and per-node records.
+
+    Callers only enqueue (ids are generated up front), a single thread
+    drains the queue and writes in batches of up to `batch_size` rows or
+    every `flush_interval` seconds, whichever comes first, using one
+    bulk INSERT per table. The queue is bounded: when the database falls
+    more than `max_pending` rows behind, producers block until it catches
+    up instead of buffering without limit.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.2, max_pending: int = 10000,
+                 session_factory=SessionLocal):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._stats = {"rows": 0, "flushes": 0, "errors": 0, "peak_pending": 0}
+        self._stats_lock = threading.Lock()  # producers and the writer thread both update _stats
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+
+    def _put(self, op: Tuple[str, Dict[str, Any]]):
+        self._queue.put(op)  # blocks while the writer is max_pending behind
+        pending = self._queue.qsize()
+        with self._stats_lock:
+            if pending > self._stats["peak_pending"]:
+                self._stats["peak_pending"] = pending
+
+    def add_workflow(self, name: str, dsl_definition: Dict[str, Any]) -> str:
+        workflow_id = str(uuid.uuid4())
+        self._put(("workflow", {"id": workflow_id, "name": name, "dsl_definition": dsl_definition}))
+        return workflow_id
+
+    def start_run(self, workflow_id: str) -> str:
+        run_id = str(uuid.uuid4())
+        self._put(("run", {"id": run_id, "workflow_id": workflow_id, "status": "RUNNING", "global_memory": {}}))
+        return run_id
+
+    def finish_run(self, run_id: str, status: str, global_memory: Dict[str, Any]):
+        self._put(("run_update", {"id": run_id, "status": status, "global_memory": global_memory}))
+
+    def record(self, run_id: str, node_id: str, event: str, payload: Any = None):
+        self._put(("node", {"run_id": run_id, "node_id": node_id, "event": event,
+                            "payload": payload, "timestamp": time.time()}))
+
+    def events(self, run_id: str):
+        """An engine `on_event` callback that records node events of `run_id`."""
+        def on_event(event: str, node_id: str, data: Any):
+            if event in _NODE_EVENTS:
+                self.record(run_id, node_id, _NODE_EVENTS[event], data)
+        return on_event
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[str, Dict[str, Any]]] = []
+            op = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if op is _STOP:
+                    stopping = True
+                    break
+                batch.append(op)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    op = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self._queue.task_done()
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        rows: Dict[str, List[Dict[str, Any]]] = {"workflow": [], "run": [], "node": [], "run_update": []}
+        for kind, row in batch:
+            rows[kind].append(row)
+
+        session = self.session_factory()
+        try:
+            # Parents first so a run's rows never precede it in the same batch
+            if rows["workflow"]:
+                session.execute(insert(Workflow), [_jsonable(row) for row in rows["workflow"]])
+            if rows["run"]:
+                session.execute(insert(WorkflowRun), rows["run"])
+            if rows["node"]:
+                for row in rows["node"]:
+                    row["payload"] = _jsonable(row["payload"])
+                session.execute(insert(NodeExecution), rows["node"])
+            for row in rows["run_update"]:
+                session.execute(update(WorkflowRun).where(WorkflowRun.id == row["id"])
+                                .values(status=row["status"], global_memory=_jsonable(row["global_memory"])))
+            session.commit()
+            with self._stats_lock:
+                self._stats["rows"] += len(batch)
+                self._stats["flushes"] += 1
+        except Exception as e:
+            # Losing a batch of history must not take the workflow down
+            session.rollback()
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            print(f"Persistence writer: dropped {len(batch)} rows ({e})")
+        finally:
+            session.close()
+
+    def flush(self):
+        """Block until everything enqueued so far is written."""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {**stats, "pending": self._queue.qsize()}
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
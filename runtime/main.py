@@ -1,18 +1,34 @@
 import argparse
+import contextlib
 import json
+import os
 import time
 import uuid
 from dotenv import load_dotenv
 
+# Before the runtime imports: some modules read their settings at import
 load_dotenv()
 
-from .db.db import init_db, SessionLocal, Workflow, WorkflowRun
-from .parser.dsl_parser import parse_workflow
+# The DB layer (SQLAlchemy, psycopg2), the HTTP server and the OpenAI SDK
+# are imported where they are first needed, so `--no-db` runs skip them.
+from .parser.dsl_parser import compile_workflow, default_plan_cache_dir
+from .parser.plan import WorkflowCompileError
 from .core.engine import WorkflowEngine
+from .core.async_engine import AsyncWorkflowEngine
+from .core.templates import template_cache
+from .core.process_pool import configure_process_pool, shutdown_process_pool
+from .core.resilience import get_latency_stats
+from .core.trace import RunTrace
 from .memory.memory import GlobalMemory
-from .memory.conversation import ConversationMemory
+from .memory.result_cache import ResultCache
+from .memory.memo import MemoStore
+from .batch import run_batch
+from .nodes.llm_dispatch import configure_dispatcher
 
-def run_single_execution(graph, args, session, workflow_id):
+def engine_class(args):
+    return AsyncWorkflowEngine if args.use_async else WorkflowEngine
+
+def run_single_execution(graph, args, writer, workflow_id, result_cache=None, memo=None):
     # Determine inputs based on workflow
     if graph.workflow_id == "intelligent_qa_demo":
         initial_inputs = {
@@ -30,17 +46,17 @@ def run_single_execution(graph, args, session, workflow_id):
             }
         }
     memory = GlobalMemory(initial_inputs)
-    engine = WorkflowEngine(graph, memory)
 
-    # Create Run Record
+    # Create Run Record (queued; node events are recorded as they happen)
     run_id = None
-    if not args.no_db and workflow_id:
-        run = WorkflowRun(workflow_id=workflow_id, status="RUNNING")
-        session.add(run)
-        session.commit()
-        run_id = run.id
+    if writer and workflow_id:
+        run_id = writer.start_run(workflow_id)
         print(f"Created workflow run (ID: {run_id})")
 
+    trace = RunTrace() if args.trace else None
+    engine = engine_class(args)(graph, memory, on_event=writer.events(run_id) if run_id else None,
+                                result_cache=result_cache, memo=memo, trace=trace)
+
     # Run
     start_time = time.time()
     try:
@@ -52,26 +68,70 @@ def run_single_execution(graph, args, session, workflow_id):
     
     duration = time.time() - start_time
     print(f"Execution finished in {duration:.2f}s")
+    if trace:
+        print(trace.report())
+        trace.write_chrome(args.trace)
+        print(f"Chrome trace written to {args.trace} (open in chrome://tracing or ui.perfetto.dev)")
+    print_template_stats()
+    print_result_cache_stats(result_cache)
+    print_memo_stats(memo)
+    print_resilience_stats()
 
     # Update Run Record
-    if not args.no_db and run_id:
-        run = session.query(WorkflowRun).filter_by(id=run_id).first()
-        run.status = status
-        run.global_memory = memory.to_dict()
-        session.commit()
+    if run_id:
+        writer.finish_run(run_id, status, memory.to_dict())
         print("Updated run record.")
 
     print("Final Memory State:")
     print(json.dumps(memory.to_dict(), indent=2))
 
-def chat_loop(graph, no_db):
+def print_template_stats():
+    stats = template_cache.stats()
+    print(f"Template cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['size']}/{stats['maxsize']} compiled)")
+
+def print_result_cache_stats(result_cache):
+    if result_cache is None:
+        return
+    for node_id, stats in result_cache.stats().items():
+        print(f"Result cache [{node_id}]: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate)")
+
+def print_memo_stats(memo):
+    if memo is None:
+        return
+    stats = memo.stats()
+    print(f"Memoized nodes: {stats['hits']} reused, {stats['misses']} executed")
+
+def print_resilience_stats():
+    stats = get_latency_stats().stats()
+    if any(stats.values()):
+        print(f"Resilience: {stats['hedged']} hedged requests ({stats['hedge_wins']} won), "
+              f"{stats['timeouts']} timeouts, {stats['retries']} retries")
+
+def print_writer_stats(writer):
+    if writer is None:
+        return
+    stats = writer.stats()
+    print(f"Persistence: {stats['rows']} rows in {stats['flushes']} flushes, "
+          f"peak queue {stats['peak_pending']}, {stats['errors']} failed flushes")
+
+def chat_loop(graph, args, result_cache=None, memo=None, writer=None, workflow_id=None):
     conversation_id = str(uuid.uuid4())
     print(f"Starting chat session: {conversation_id}")
     print("Type 'exit' to quit.")
     
     memory_manager = None
-    if not no_db:
-        memory_manager = ConversationMemory(conversation_id)
+    if not args.no_db:
+        from .memory.conversation import ConversationMemory
+
+        summarizer = None
+        if args.summary_model:
+            from .memory.summary import LLMSummarizer
+
+            summarizer = LLMSummarizer(args.summary_model)
+        memory_manager = ConversationMemory(conversation_id, token_budget=args.memory_tokens,
+                                            summarizer=summarizer)
 
     while True:
         try:
@@ -95,10 +155,34 @@ def chat_loop(graph, no_db):
                 }
             }
             
+            # Stream partial LLM output (nodes with `stream: true`) as it arrives
+            streamed = []
+            def on_event(event, node_id, data):
+                if event == "token":
+                    if not streamed:
+                        print("Bot: ", end="", flush=True)
+                    streamed.append(data)
+                    print(data, end="", flush=True)
+
             # Run Workflow
             memory = GlobalMemory(inputs)
-            engine = WorkflowEngine(graph, memory)
-            engine.run()
+            run_id = writer.start_run(workflow_id) if writer and workflow_id else None
+            record = writer.events(run_id) if run_id else None
+
+            def on_any_event(event, node_id, data):
+                on_event(event, node_id, data)
+                if record:
+                    record(event, node_id, data)
+
+            engine = engine_class(args)(graph, memory, on_event=on_any_event,
+                                        result_cache=result_cache, memo=memo)
+            status = "FAILED"
+            try:
+                engine.run()
+                status = "COMPLETED"
+            finally:
+                if run_id:
+                    writer.finish_run(run_id, status, memory.to_dict())
             
             # Get output
             # For AWS bot, 'end_node' has the message.
@@ -107,7 +191,10 @@ def chat_loop(graph, no_db):
             if final_output and isinstance(final_output, dict):
                  response = final_output.get("printed", "...")
             
-            print(f"Bot: {response}")
+            if streamed:
+                print()
+            else:
+                print(f"Bot: {response}")
             
             if memory_manager:
                 memory_manager.add_message("assistant", response)
@@ -119,16 +206,62 @@ def chat_loop(graph, no_db):
             import traceback
             traceback.print_exc()
 
+    if memory_manager and memory_manager.token_budget:
+        print(f"Conversation memory: {memory_manager.summaries} summary updates "
+              f"(up to message {memory_manager.summarized_seq})")
+    print_template_stats()
+    print_result_cache_stats(result_cache)
+    print_memo_stats(memo)
+    print_resilience_stats()
+
 def main():
     parser = argparse.ArgumentParser(description="Dify vNext Runtime Demo")
     parser.add_argument("--file", type=str, default="dsl/vnext/demo.yaml", help="Path to workflow YAML file")
     parser.add_argument("--no-db", action="store_true", help="Skip database persistence")
     parser.add_argument("--chat", action="store_true", help="Run in interactive chat mode")
+    parser.add_argument("--memory-tokens", type=int, default=None,
+                        help="Chat mode: token budget for the history, older turns are summarized")
+    parser.add_argument("--summary-model", type=str, default=None,
+                        help="Chat mode: model that writes the rolling summary (default: clip old turns)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run nodes on the asyncio engine")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the node result cache")
+    parser.add_argument("--cache-db", type=str, default=None, help="SQLite file for a persistent result cache tier")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="Default result cache TTL in seconds")
+    parser.add_argument("--db-batch-size", type=int, default=500, help="Max rows per persistence flush")
+    parser.add_argument("--db-flush-ms", type=float, default=200, help="Max delay before queued rows are flushed")
+    parser.add_argument("--trace", type=str, default=None,
+                        help="Time every node, print a critical-path summary and write a Chrome trace to this file")
+    parser.add_argument("--plan-cache", type=str, nargs="?", const=default_plan_cache_dir(), default=None,
+                        help="Cache compiled workflow plans, keyed by DSL and runtime source hash "
+                             f"(default directory: {default_plan_cache_dir()})")
+    parser.add_argument("--no-plan-cache", action="store_true", help="Always recompile the workflow (the default)")
+    parser.add_argument("--no-memo", action="store_true", help="Always re-execute pure nodes")
+    parser.add_argument("--batch", type=str, default=None, help="Run the workflow once per line of a JSONL inputs file")
+    parser.add_argument("--output", type=str, default="batch_results.jsonl", help="Batch mode: JSONL results file")
+    parser.add_argument("--concurrency", type=int, default=16, help="Batch mode: max concurrent workflow runs")
+    parser.add_argument("--preserve-order", action="store_true", help="Batch mode: write results in input order")
+    parser.add_argument("--quiet", action="store_true", help="Batch / serve mode: suppress per-node logs")
+    parser.add_argument("--llm-batch-window-ms", type=float, default=None,
+                        help="Gather concurrent LLM calls per model within this window before sending them")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Max in-flight LLM calls per model (with --llm-batch-window-ms)")
+    parser.add_argument("--llm-tpm", type=float, default=None, help="Token-rate budget per model, tokens/minute (with --llm-batch-window-ms)")
+    parser.add_argument("--serve", action="store_true", help="Run an HTTP server for the loaded workflows")
+    parser.add_argument("--workflows", type=str, nargs="*", default=[],
+                        help="Serve mode: extra workflow files to register next to --file")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Serve mode: bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Serve mode: port")
+    parser.add_argument("--process-workers", type=int, default=None,
+                        help="Worker processes for nodes with `executor: process` (default: CPU count)")
     args = parser.parse_args()
 
+    if args.process_workers:
+        configure_process_pool(args.process_workers)
+
     # 1. Init DB
     if not args.no_db:
         try:
+            from .db.db import init_db
+
             init_db()
             print("Database initialized.")
         except Exception as e:
@@ -141,29 +274,82 @@ def main():
     
     print(f"Loaded workflow from {args.file}")
 
-    # 3. Parse DSL
-    graph = parse_workflow(yaml_content)
+    # 3. Compile DSL (validated; reloaded from the plan cache when unchanged)
+    plan_cache = None if args.no_plan_cache else args.plan_cache
+    try:
+        graph = compile_workflow(yaml_content, plan_cache)
+    except WorkflowCompileError as e:
+        print(e)
+        raise SystemExit(1)
     print(f"=" * 60)
     print(f"Workflow: {graph.workflow_id} (v{graph.version})")
     print(f"=" * 60)
+    if graph.pruned:
+        print(f"Pruned nodes whose results nothing reads: {', '.join(graph.pruned)}")
 
     # 4. Persist Workflow Definition
-    session = None
+    # Writes go through a background writer, so runs never wait on the DB
+    writer = None
     workflow_id = None
     if not args.no_db:
-        session = SessionLocal()
-        workflow = Workflow(name="Demo Workflow", dsl_definition=graph.nodes)
-        session.add(workflow)
-        session.commit()
-        workflow_id = workflow.id
+        from .db.writer import PersistenceWriter
+
+        writer = PersistenceWriter(batch_size=args.db_batch_size, flush_interval=args.db_flush_ms / 1000)
+        workflow_id = writer.add_workflow("Demo Workflow", graph.nodes)
         print(f"Persisted workflow definition (ID: {workflow_id})")
 
-    if args.chat:
-        chat_loop(graph, args.no_db)
+    result_cache = None
+    if not args.no_cache:
+        result_cache = ResultCache(ttl=args.cache_ttl, db_path=args.cache_db)
+
+    # Shared by every run of this process
+    memo = None if args.no_memo else MemoStore()
+
+    dispatcher = None
+    if args.llm_batch_window_ms is not None:
+        dispatcher = configure_dispatcher(window_ms=args.llm_batch_window_ms,
+                                          max_concurrency=args.llm_concurrency,
+                                          tokens_per_minute=args.llm_tpm)
+
+    if args.batch:
+        run_batch(graph, args.batch, args.output, args.concurrency, args.preserve_order,
+                  args.quiet, result_cache, memo, writer, workflow_id)
+        print_result_cache_stats(result_cache)
+        print_memo_stats(memo)
+        print_resilience_stats()
+    elif args.serve:
+        from .server import WorkflowRegistry, serve
+
+        registry = WorkflowRegistry(plan_cache)
+        registry.add(graph)
+        for path in args.workflows:
+            registry.load(path)
+        with contextlib.ExitStack() as stack:
+            if args.quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            serve(registry, args.host, args.port, result_cache, memo)
+        print_result_cache_stats(result_cache)
+        print_memo_stats(memo)
+        print_resilience_stats()
+    elif args.chat:
+        chat_loop(graph, args, result_cache, memo, writer, workflow_id)
     else:
-        run_single_execution(graph, args, session, workflow_id)
-        if session:
-            session.close()
+        run_single_execution(graph, args, writer, workflow_id, result_cache, memo)
+
+    if writer:
+        writer.close()  # drains the queue
+        print_writer_stats(writer)
+
+    if dispatcher:
+        for model, stats in dispatcher.metrics().items():
+            print(f"LLM dispatch [{model}]: {stats['requests']} requests in {stats['batches']} batches, "
+                  f"avg wait {stats['avg_wait_ms']:.1f}ms (max {stats['max_wait_ms']:.1f}ms), "
+                  f"queue depth {stats['queue_depth']}")
+        dispatcher.close()
+
+    if result_cache:
+        result_cache.close()
+    shutdown_process_pool()
 
 if __name__ == "__main__":
     main()
@@ -1,40 +1,135 @@
-from typing import List, Dict, Any
+from collections import deque
+from typing import Callable, Deque, List, Dict, Any, Optional
+from sqlalchemy import func
 from ..db.db import SessionLocal, Conversation, Message
+from .summary import clip_summarizer
+from .tokens import count_tokens, truncate_tokens
 
 class ConversationMemory:
-    def __init__(self, conversation_id: str, user_id: str = None):
+    """
+    Chat history of one conversation. The last `buffer_size` messages are
+    kept in an in-process ring buffer, so chat turns read their history
+    without a DB round-trip; older windows come from an indexed
+    `(conversation_id, seq)` query that fetches only the rows it returns.
+
+    With a `token_budget`, `get_history_str` returns the most recent
+    messages that fit the budget, preceded by a rolling summary of
+    everything older. Messages leaving the window are folded into the
+    summary by `summarizer`; the summary gets `summary_share` of the budget.
+    The newest message is never folded: one larger than the window is cut
+    to fit instead.
+    Token counts are taken once per message and stored with it.
+    """
+
+    def __init__(self, conversation_id: str, user_id: str = None, buffer_size: int = 50,
+                 token_budget: Optional[int] = None, summarizer: Optional[Callable[..., str]] = None,
+                 summary_share: float = 0.25):
         self.conversation_id = conversation_id
         self.user_id = user_id
+        self.token_budget = token_budget
+        self.summarizer = summarizer or clip_summarizer
+        self.summary_budget = int(token_budget * summary_share) if token_budget else 0
         self.session = SessionLocal()
-        self._ensure_conversation()
+        self.summaries = 0
+        conv = self._ensure_conversation()
+        self.summary = conv.summary or ""
+        self.summarized_seq = conv.summarized_seq or 0
+        self._seq = self.session.query(func.max(Message.seq))\
+            .filter_by(conversation_id=self.conversation_id).scalar() or 0
+        if token_budget:
+            # Holds the unsummarized tail, which the budget keeps short
+            self._buffer: Deque[Dict[str, Any]] = deque(self._query_messages(after_seq=self.summarized_seq))
+        else:
+            # Seed the buffer with the most recent messages of a resumed conversation
+            self._buffer = deque(self._query_messages(limit=buffer_size), maxlen=buffer_size)
 
-    def _ensure_conversation(self):
+    def _ensure_conversation(self) -> Conversation:
         conv = self.session.query(Conversation).filter_by(id=self.conversation_id).first()
         if not conv:
-            conv = Conversation(id=self.conversation_id, user_id=self.user_id)
+            conv = Conversation(id=self.conversation_id, user_id=self.user_id, summarized_seq=0)
             self.session.add(conv)
             self.session.commit()
+        return conv
 
     def add_message(self, role: str, content: str):
-        msg = Message(conversation_id=self.conversation_id, role=role, content=content)
+        self._seq += 1
+        tokens = count_tokens(content)
+        msg = Message(conversation_id=self.conversation_id, role=role, content=content,
+                      seq=self._seq, tokens=tokens)
         self.session.add(msg)
         self.session.commit()
+        self._buffer.append({"role": role, "content": content, "seq": self._seq, "tokens": tokens})
+
+    def _query_messages(self, limit: Optional[int] = None, after_seq: int = 0) -> List[Dict[str, Any]]:
+        if limit is not None and limit <= 0:
+            return []
+        query = self.session.query(Message.role, Message.content, Message.seq, Message.tokens)\
+            .filter(Message.conversation_id == self.conversation_id, Message.seq > after_seq)\
+            .order_by(Message.seq.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return [
+            {"role": role, "content": content, "seq": seq,
+             "tokens": tokens if tokens is not None else count_tokens(content)}
+            for role, content, seq, tokens in reversed(query.all())
+        ]
 
     def get_history(self, limit: int = 10) -> List[Dict[str, str]]:
-        # Simple history retrieval
-        # msgs = self.session.query(Message).filter_by(conversation_id=self.conversation_id)\
-        #     .order_by(Message.id).all() # Should order by created_at in real app
-        
-        msgs = self.session.query(Message).order_by(Message.id).all()
-        
-        # Take last N
-        msgs = msgs[-limit:]
-        
-        return [{"role": m.role, "content": m.content} for m in msgs]
+        if limit <= 0:
+            return []
+        # The buffer holds the whole conversation until it wraps around
+        if limit <= len(self._buffer) or len(self._buffer) == self._seq:
+            msgs = list(self._buffer)[-limit:]
+        else:
+            msgs = self._query_messages(limit)
+        return [{"role": m["role"], "content": m["content"]} for m in msgs]
 
     def get_history_str(self, limit: int = 10) -> str:
+        if self.token_budget:
+            return self.get_context()
         history = self.get_history(limit)
         return "\n".join([f"{m['role']}: {m['content']}" for m in history])
 
+    def get_context(self) -> str:
+        """Rolling summary plus the newest messages, within `token_budget`."""
+        window = list(self._buffer)
+        window_budget = self.token_budget - self.summary_budget
+        total = sum(m["tokens"] for m in window)
+        if total > window_budget:
+            # Fold down to half the window so the summarizer runs every few
+            # turns, not on every turn once the budget is reached
+            folded = []
+            while len(window) > 1 and total > window_budget // 2:
+                m = window.pop(0)
+                total -= m["tokens"]
+                folded.append(m)
+            if folded:
+                self._fold(folded)
+
+        lines = []
+        if self.summary:
+            lines.append(f"Summary of earlier conversation:\n{self.summary}")
+        lines += [f"{m['role']}: {m['content']}" for m in window[:-1]]
+        if window:
+            # The turn being answered is never summarized, only cut when it
+            # alone is larger than the window
+            newest = window[-1]
+            content = newest["content"]
+            if newest["tokens"] > window_budget:
+                content = truncate_tokens(content, window_budget)
+            lines.append(f"{newest['role']}: {content}")
+        return "\n".join(lines)
+
+    def _fold(self, messages: List[Dict[str, Any]]):
+        self.summary = self.summarizer(self.summary, [{"role": m["role"], "content": m["content"]} for m in messages],
+                                       self.summary_budget)
+        self.summarized_seq = messages[-1]["seq"]
+        self.summaries += 1
+        while self._buffer and self._buffer[0]["seq"] <= self.summarized_seq:
+            self._buffer.popleft()
+        self.session.query(Conversation).filter_by(id=self.conversation_id)\
+            .update({"summary": self.summary, "summarized_seq": self.summarized_seq})
+        self.session.commit()
+
     def close(self):
         self.session.close()
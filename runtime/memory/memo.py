@@ -0,0 +1,55 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
+def content_hash(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=repr)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def node_key(config: Any, input_hashes: Iterable[Tuple[str, Optional[str]]]) -> str:
+    """Content address of a node execution: its config plus the hashes of everything it reads."""
+    return content_hash([config, sorted(input_hashes)])
+
+class MemoStore:
+    """
+    Content-addressed store of node outputs, shared across runs.
+
+    The engine looks nodes up by `node_key` before resolving their inputs,
+    so a node whose config and upstream outputs are unchanged is not
+    re-executed (and not even re-rendered). Each output is stored with its
+    own hash, which feeds the keys of downstream nodes: when a re-executed
+    node produces the same output as before, its consumers are still reused.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, str]]:
+        """Returns (output, output_hash) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, output: Any) -> str:
+        output_hash = content_hash(output)
+        with self._lock:
+            self._entries[key] = (output, output_hash)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return output_hash
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -1,27 +1,108 @@
 import threading
-from typing import Any, Dict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+class MemorySnapshot(Mapping):
+    """
+    Immutable, read-only view of GlobalMemory as of one version.
+
+    Creating a snapshot is O(1): it only records the version and the number
+    of keys that existed at that point, nothing is copied.
+    """
+
+    __slots__ = ("_memory", "version", "_size")
+
+    def __init__(self, memory: "GlobalMemory", version: int, size: int):
+        self._memory = memory
+        self.version = version
+        self._size = size
+
+    def __getitem__(self, key: str) -> Any:
+        return self._memory._value_at(key, self.version)
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self._memory._value_at(key, self.version)
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self._memory._keys
+        for i in range(self._size):
+            yield keys[i]
+
+    def __len__(self) -> int:
+        return self._size
 
 class GlobalMemory:
+    """
+    Versioned, append-only key/value store shared by all nodes of a run.
+
+    Every `set` bumps the version and appends `(version, value)` to the
+    key's history instead of mutating shared state, so readers never need
+    the lock and snapshots are O(1). Nodes write each key once per run, so
+    histories stay one entry long in practice.
+    """
+
     def __init__(self, initial_data: Dict[str, Any] = None):
-        self._data = initial_data or {}
-        self._lock = threading.Lock()
+        self._lock = threading.Lock()  # serializes writers only
+        self._version = 0
+        self._keys: List[str] = []  # insertion order
+        self._history: Dict[str, List[Tuple[int, Any]]] = {}
+        for key, value in (initial_data or {}).items():
+            self._keys.append(key)
+            self._history[key] = [(0, value)]
 
-    def get(self, key: str) -> Any:
-        with self._lock:
-            # Support dot notation for nested access (simplified)
-            keys = key.split('.')
-            value = self._data
-            for k in keys:
-                if isinstance(value, dict) and k in value:
-                    value = value[k]
-                else:
-                    return None
-            return value
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _value_at(self, key: str, version: int) -> Any:
+        history = self._history.get(key)
+        if history:
+            for entry_version, value in reversed(history):
+                if entry_version <= version:
+                    return value
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Support dot notation for nested access (simplified)
+        keys = key.split('.')
+        history = self._history.get(keys[0])
+        if not history:
+            return default
+        value = history[-1][1]
+        for k in keys[1:]:
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return default
+        return value
 
     def set(self, key: str, value: Any):
         with self._lock:
-            self._data[key] = value
+            self._version += 1
+            history = self._history.get(key)
+            if history is None:
+                self._history[key] = [(self._version, value)]
+                self._keys.append(key)
+            else:
+                history.append((self._version, value))
 
-    def to_dict(self) -> Dict[str, Any]:
+    def snapshot(self) -> MemorySnapshot:
         with self._lock:
-            return self._data.copy()
+            return MemorySnapshot(self, self._version, len(self._keys))
+
+    def view(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Latest values of just `keys` (e.g. the names a node's templates reference)."""
+        view = {}
+        for key in keys:
+            history = self._history.get(key)
+            if history:
+                view[key] = history[-1][1]
+        return view
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Materialized copy, for persistence and printing
+        return dict(self.snapshot())
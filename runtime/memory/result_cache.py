@@ -0,0 +1,105 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class ResultCache:
+    """
+    Two-tier cache of node results for deterministic nodes.
+
+    Tier 1 is an in-process LRU; tier 2 is an optional SQLite file so
+    results survive restarts and can be shared between processes. Entries
+    carry an optional TTL. Hits and misses are counted per node id.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, db_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS node_results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(node_type: str, inputs: Dict[str, Any]) -> str:
+        # Resolved inputs include the model and temperature for LLM nodes
+        payload = json.dumps([node_type, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _record(self, node_id: str, hit: bool):
+        counts = self._stats.setdefault(node_id, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+    def get(self, key: str, node_id: str = "") -> Tuple[bool, Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._record(node_id, True)
+                    return True, value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM node_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = json.loads(row[0]), row[1]
+                    if expires_at is None or expires_at > now:
+                        self._put(key, expires_at, value)
+                        self._record(node_id, True)
+                        return True, value
+                    self._db.execute("DELETE FROM node_results WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._record(node_id, False)
+            return False, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._put(key, expires_at, value)
+            if self._db is not None:
+                try:
+                    encoded = json.dumps(value)
+                except TypeError:
+                    return  # not JSON-serializable, keep it in memory only
+                self._db.execute(
+                    "INSERT OR REPLACE INTO node_results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, encoded, expires_at),
+                )
+                self._db.commit()
+
+    def _put(self, key: str, expires_at: Optional[float], value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            report = {}
+            for node_id, counts in self._stats.items():
+                total = counts["hits"] + counts["misses"]
+                report[node_id] = {**counts, "hit_rate": counts["hits"] / total if total else 0.0}
+            return report
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,48 @@
+from typing import Dict, List
+
+from .tokens import count_tokens
+
+# A summarizer folds messages that fell out of the history window into the
+# running summary: (summary, messages, max_tokens) -> new summary
+
+def _clip(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+def clip_summarizer(summary: str, messages: List[Dict[str, str]], max_tokens: int) -> str:
+    """No model call: one clipped line per message, oldest lines dropped first."""
+    lines = summary.splitlines() if summary else []
+    lines += [f"{m['role']}: {_clip(m['content'], 200)}" for m in messages]
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+class LLMSummarizer:
+    """Rolling summary written by a chat model; clips instead when the call fails."""
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self.model = model
+
+    def __call__(self, summary: str, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        from ..nodes.clients import get_client, llm_settings
+
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = (
+            "Update the running summary of this conversation with the new messages. Keep the "
+            f"user's goals, facts and open questions. Answer with the summary only, at most {max_tokens} tokens.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"
+        )
+        settings = llm_settings()
+        try:
+            if not settings["api_key"]:
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            response = get_client(settings["api_key"], settings["base_url"]).chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                max_tokens=max_tokens,
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Summarizer failed ({e}), clipping instead")
+            return clip_summarizer(summary, messages, max_tokens)
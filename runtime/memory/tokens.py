@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Optional
+
+# tiktoken is optional: without it token counts are estimated from length
+
+@lru_cache(maxsize=8)
+def _encoding(name: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(name)
+
+def count_tokens(text: str, encoding: Optional[str] = "cl100k_base") -> int:
+    """Tokens in `text`: exact with tiktoken, otherwise ~4 characters per token."""
+    if not text:
+        return 0
+    enc = _encoding(encoding) if encoding else None
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, max_tokens: int, encoding: Optional[str] = "cl100k_base") -> str:
+    """The start of `text`, cut to about `max_tokens` tokens with a trailing "..."."""
+    if count_tokens(text, encoding) <= max_tokens:
+        return text
+    keep = max(max_tokens - 1, 0)  # room for the marker
+    enc = _encoding(encoding) if encoding else None
+    if enc is None:
+        return text[:keep * 4] + "..."
+    return enc.decode(enc.encode(text, disallowed_special=())[:keep]) + "..."
@@ -1,19 +1,69 @@
-from .simple import SleepNode, PrintNode, MathNode, IntentClassifierNode, RouterNode, MockSearchNode as SimpleMockSearchNode
-from .llm import LLMNode, MockSearchNode, FormatNode
-
-NODE_CLASSES = {
-    "sleep": SleepNode,
-    "print": PrintNode,
-    "math": MathNode,
-    "llm": LLMNode,
-    "mock_search": SimpleMockSearchNode, # Use the one from simple.py for this demo
-    "format": FormatNode,
-    "intent_classifier": IntentClassifierNode,
-    "router": RouterNode,
+import importlib
+from collections.abc import MutableMapping
+
+class NodeRegistry(MutableMapping):
+    """
+    node type -> node class. Built-in types are registered as "module:Class"
+    and imported on first lookup, so e.g. `openai` is only loaded once a
+    workflow actually uses an llm node. Classes can be registered directly.
+    """
+
+    def __init__(self, entries: dict):
+        self._entries = dict(entries)
+
+    def __getitem__(self, node_type: str):
+        entry = self._entries[node_type]
+        if isinstance(entry, str):
+            module_name, _, class_name = entry.partition(":")
+            entry = getattr(importlib.import_module(module_name, __name__), class_name)
+            self._entries[node_type] = entry
+        return entry
+
+    def __setitem__(self, node_type: str, node_cls):
+        self._entries[node_type] = node_cls
+
+    def __delitem__(self, node_type: str):
+        del self._entries[node_type]
+
+    def __contains__(self, node_type) -> bool:
+        return node_type in self._entries  # without importing the class
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+NODE_CLASSES = NodeRegistry({
+    "sleep": ".simple:SleepNode",
+    "print": ".simple:PrintNode",
+    "math": ".simple:MathNode",
+    "llm": ".llm:LLMNode",
+    "mock_search": ".simple:MockSearchNode", # Use the one from simple.py for this demo
+    "format": ".llm:FormatNode",
+    "intent_classifier": ".simple:IntentClassifierNode",
+    "router": ".simple:RouterNode",
+})
+
+# `from runtime.nodes import LLMNode` etc. still works, imported on access
+_EXPORTS = {
+    "SleepNode": ".simple", "PrintNode": ".simple", "MathNode": ".simple",
+    "IntentClassifierNode": ".simple", "RouterNode": ".simple",
+    "SimpleMockSearchNode": ".simple:MockSearchNode",
+    "LLMNode": ".llm", "MockSearchNode": ".llm", "FormatNode": ".llm",
 }
 
-def create_node(node_id: str, node_type: str, config: dict):
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, _, class_name = _EXPORTS[name].partition(":")
+    return getattr(importlib.import_module(module_name, __name__), class_name or name)
+
+def get_node_class(node_type: str):
     node_cls = NODE_CLASSES.get(node_type)
     if not node_cls:
         raise ValueError(f"Unknown node type: {node_type}")
-    return node_cls(node_id, config)
+    return node_cls
+
+def create_node(node_id: str, node_type: str, config: dict):
+    return get_node_class(node_type)(node_id, config)
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import threading
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+# `openai` (and httpx) take most of a second to import, so they are only
+# loaded when the first client is created.
+
+# Process-wide OpenAI clients, shared by every LLM node and every run so
+# connections (and TLS sessions) are kept alive between calls.
+
+ClientKey = Tuple[str, Optional[str]]
+
+_lock = threading.Lock()
+_clients: Dict[ClientKey, "OpenAI"] = {}
+# httpx async pools are bound to the event loop they were created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[ClientKey, 'AsyncOpenAI']]" = weakref.WeakKeyDictionary()
+
+@lru_cache(maxsize=1)
+def llm_settings() -> dict:
+    """OpenAI settings from the environment, read once per process (see `reload_settings`)."""
+    return {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        # Supports OpenAI proxies/mirrors, Azure OpenAI endpoints and local
+        # model servers (vLLM, Ollama, LM Studio, etc.)
+        "base_url": os.getenv("OPENAI_BASE_URL"),
+        "max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+        "max_keepalive_connections": int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        "keepalive_expiry": float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+    }
+
+def reload_settings():
+    llm_settings.cache_clear()
+
+def _limits() -> "httpx.Limits":
+    import httpx
+
+    settings = llm_settings()
+    return httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+
+def get_client(api_key: str, base_url: Optional[str] = None) -> "OpenAI":
+    from openai import DefaultHttpxClient, OpenAI
+
+    key = (api_key, base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=DefaultHttpxClient(limits=_limits()))
+            _clients[key] = client
+        return client
+
+def get_async_client(api_key: str, base_url: Optional[str] = None) -> "AsyncOpenAI":
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=DefaultAsyncHttpxClient(limits=_limits()))
+            clients[key] = client
+        return client
+
+def close_clients():
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
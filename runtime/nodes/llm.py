@@ -1,70 +1,159 @@
-import os
-from openai import OpenAI
-from .simple import BaseNode
+from typing import Optional
+
+from .simple import BaseNode, NodeCancelled
+from .clients import get_async_client, get_client, llm_settings
+from .llm_dispatch import get_dispatcher
 
 class LLMNode(BaseNode):
-    def run(self, inputs: dict) -> dict:
-        model = inputs.get("model", "gpt-4o")
-        prompt = inputs.get("prompt", "")
-        temperature = float(inputs.get("temperature", 0.7))
-        max_tokens = int(inputs.get("max_tokens", 1000))
-        
-        # Get OpenAI API key from environment
-        api_key = os.getenv("OPENAI_API_KEY")
+    resource_class = "llm"
+    idempotent = True
+    degraded = False  # set when the API call failed and the mock response stands in
+
+    def _client_key(self):
+        settings = llm_settings()
+        api_key = settings["api_key"]
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
-        
-        # Get base_url from environment variable
-        # This supports:
-        # - OpenAI proxies/mirrors
-        # - Azure OpenAI endpoints
-        # - Local model servers (vLLM, Ollama, LM Studio, etc.)
-        base_url = os.getenv("OPENAI_BASE_URL")
-        
-        # Initialize OpenAI client with optional base_url
+
+        base_url = settings["base_url"]
         if base_url:
-            client = OpenAI(api_key=api_key, base_url=base_url)
             print(f"[{self.node_id}] Using custom base_url: {base_url}")
-        else:
-            client = OpenAI(api_key=api_key)
+        return api_key, base_url
+
+    def _request(self, inputs: dict) -> dict:
+        model = inputs.get("model", "gpt-4o")
+        prompt = inputs.get("prompt", "")
         
         import datetime
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] [{self.node_id}] Calling OpenAI {model}...")
         print(f"[{timestamp}] [{self.node_id}] Prompt: {prompt[:100]}...")
-        
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            
-            text = response.choices[0].message.content
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            }
-        except Exception as e:
-            print(f"[{self.node_id}] OpenAI API call failed: {e}")
-            print(f"[{self.node_id}] Falling back to MOCK response.")
-            text = f"[MOCK LLM RESPONSE] Based on the search results, here is the solution for your '{model}' query.\n\n(Real API call failed, this is a simulation.)"
-            usage = {"total_tokens": 0}
-        
+
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": float(inputs.get("temperature", 0.7)),
+            "max_tokens": int(inputs.get("max_tokens", 1000)),
+        }
+
+    def _parse_response(self, response):
+        text = response.choices[0].message.content
+        usage = {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "total_tokens": response.usage.total_tokens
+        }
+        return text, usage
+
+    def _fallback(self, request: dict, error: Exception):
+        if self.retrying or isinstance(error, NodeCancelled):
+            raise error
+        print(f"[{self.node_id}] OpenAI API call failed: {error}")
+        print(f"[{self.node_id}] Falling back to MOCK response.")
+        self.degraded = True
+        text = f"[MOCK LLM RESPONSE] Based on the search results, here is the solution for your '{request['model']}' query.\n\n(Real API call failed, this is a simulation.)"
+        usage = {"total_tokens": 0}
+        return text, usage
+
+    def _result(self, request: dict, text: str, usage: dict) -> dict:
         import datetime
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] [{self.node_id}] Response: {text[:100]}...")
         print(f"[{timestamp}] [{self.node_id}] Tokens used: {usage['total_tokens']}")
         
-        return {
+        result = {
             "text": text,
             "usage": usage,
-            "model": model
+            "model": request["model"]
         }
+        if self.degraded:
+            # Stand-in output: the engine neither caches nor memoizes it
+            result["degraded"] = True
+        return result
+
+    def _stream_request(self, request: dict) -> dict:
+        return {**request, "stream": True, "stream_options": {"include_usage": True}}
+
+    def _read_chunk(self, chunk, parts: list) -> Optional[dict]:
+        # Emits the chunk's delta as a "token" event; returns usage if present
+        self.check_cancelled()
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                self.emit("token", delta)
+        if chunk.usage:
+            return {
+                "prompt_tokens": chunk.usage.prompt_tokens,
+                "completion_tokens": chunk.usage.completion_tokens,
+                "total_tokens": chunk.usage.total_tokens
+            }
+        return None
+
+    def _stream_fallback(self, request: dict, error: Exception, parts: list):
+        text, usage = self._fallback(request, error)
+        if not parts:
+            # Let the caller render something instead of waiting forever
+            self.emit("token", text)
+        return text, usage
+
+    def run(self, inputs: dict) -> dict:
+        client_key = self._client_key()
+        request = self._request(inputs)
+        if self.config.get("stream"):
+            return self._run_stream(get_client(*client_key), request)
+        try:
+            dispatcher = get_dispatcher()
+            if dispatcher is not None:
+                response = dispatcher.submit(client_key, request).result()
+            else:
+                response = get_client(*client_key).chat.completions.create(**request)
+            text, usage = self._parse_response(response)
+        except Exception as e:
+            text, usage = self._fallback(request, e)
+        return self._result(request, text, usage)
+
+    def _run_stream(self, client, request: dict) -> dict:
+        parts, usage = [], {"total_tokens": 0}
+        try:
+            for chunk in client.chat.completions.create(**self._stream_request(request)):
+                usage = self._read_chunk(chunk, parts) or usage
+            text = "".join(parts)
+        except Exception as e:
+            text, usage = self._stream_fallback(request, e, parts)
+        return self._result(request, text, usage)
+
+    async def arun(self, inputs: dict) -> dict:
+        client_key = self._client_key()
+        request = self._request(inputs)
+        if self.config.get("stream"):
+            return await self._arun_stream(get_async_client(*client_key), request)
+        try:
+            dispatcher = get_dispatcher()
+            if dispatcher is not None:
+                response = await dispatcher.asubmit(client_key, request)
+            else:
+                response = await get_async_client(*client_key).chat.completions.create(**request)
+            text, usage = self._parse_response(response)
+        except Exception as e:
+            text, usage = self._fallback(request, e)
+        return self._result(request, text, usage)
+
+    async def _arun_stream(self, client, request: dict) -> dict:
+        parts, usage = [], {"total_tokens": 0}
+        try:
+            async for chunk in await client.chat.completions.create(**self._stream_request(request)):
+                usage = self._read_chunk(chunk, parts) or usage
+            text = "".join(parts)
+        except Exception as e:
+            text, usage = self._stream_fallback(request, e, parts)
+        return self._result(request, text, usage)
 
 class MockSearchNode(BaseNode):
+    cacheable = True
+    resource_class = "io"
+    idempotent = True
+
     def run(self, inputs: dict) -> dict:
         keywords = inputs.get("keywords", "")
         print(f"[{self.node_id}] Simulating search for: {keywords}")
@@ -80,6 +169,9 @@ class MockSearchNode(BaseNode):
         }
 
 class FormatNode(BaseNode):
+    pure = True
+    inline = True
+
     def run(self, inputs: dict) -> dict:
         template = inputs.get("template", "{{ text }}")
         print(f"[{self.node_id}] Formatting output...")
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .clients import get_async_client
+
+ClientKey = Tuple[str, Optional[str]]
+
+class _TokenBucket:
+    """Token-rate budget: `tokens_per_minute` capacity, refilled continuously."""
+
+    def __init__(self, tokens_per_minute: float):
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+
+    async def take(self, cost: float):
+        cost = min(cost, self.capacity)  # a single huge request must still go through
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return
+            await asyncio.sleep((cost - self.tokens) / self.rate)
+
+class _ModelLane:
+    """Pending requests, limits and metrics for one model."""
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: Optional[float]):
+        self.pending: Deque[Tuple[ClientKey, Dict[str, Any], Future, float]] = deque()
+        self.flush_scheduled = False
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.budget = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.queued = 0  # enqueued but not yet sent
+        self.in_flight = 0
+        self.requests = 0
+        self.batches = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+class LLMDispatcher:
+    """
+    Gathers chat completion calls from all concurrently running LLM nodes
+    (across workflow runs), per model, within a small time window, then
+    sends them together so batching backends such as vLLM see them
+    arrive at once. Each model has a concurrency cap and an optional
+    token-rate budget; results are fanned back out to the waiting nodes.
+
+    The dispatcher owns an event loop on a background thread, so both the
+    thread-pool engine and the asyncio engine can submit to it.
+    """
+
+    def __init__(self, window_ms: float = 5.0, max_concurrency: int = 8,
+                 tokens_per_minute: Optional[float] = None,
+                 model_limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.window = window_ms / 1000.0
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = model_limits or {}
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-dispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, client_key: ClientKey, request: Dict[str, Any]) -> Future:
+        """Thread-safe; the future resolves to the chat completion response."""
+        future: Future = Future()
+        self._loop.call_soon_threadsafe(self._enqueue, client_key, request, future, time.monotonic())
+        return future
+
+    async def asubmit(self, client_key: ClientKey, request: Dict[str, Any]):
+        return await asyncio.wrap_future(self.submit(client_key, request))
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            limits = self.model_limits.get(model, {})
+            lane = _ModelLane(limits.get("max_concurrency", self.max_concurrency),
+                              limits.get("tokens_per_minute", self.tokens_per_minute))
+            self._lanes[model] = lane
+        return lane
+
+    def _enqueue(self, client_key: ClientKey, request: Dict[str, Any], future: Future, enqueued_at: float):
+        lane = self._lane(request["model"])
+        lane.pending.append((client_key, request, future, enqueued_at))
+        lane.queued += 1
+        if not lane.flush_scheduled:
+            lane.flush_scheduled = True
+            self._loop.call_later(self.window, self._flush, lane)
+
+    def _flush(self, lane: _ModelLane):
+        lane.flush_scheduled = False
+        lane.batches += 1
+        while lane.pending:
+            self._loop.create_task(self._send(lane, *lane.pending.popleft()))
+
+    async def _send(self, lane: _ModelLane, client_key: ClientKey, request: Dict[str, Any],
+                    future: Future, enqueued_at: float):
+        async with lane.slots:
+            if lane.budget is not None:
+                await lane.budget.take(_estimate_tokens(request))
+
+            waited = time.monotonic() - enqueued_at
+            lane.queued -= 1
+            lane.in_flight += 1
+            lane.requests += 1
+            lane.total_wait += waited
+            lane.max_wait = max(lane.max_wait, waited)
+            try:
+                client = get_async_client(*client_key)
+                response = await client.chat.completions.create(**request)
+                if not future.cancelled():
+                    future.set_result(response)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                lane.in_flight -= 1
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        def collect():
+            return {
+                model: {
+                    "queue_depth": lane.queued,
+                    "in_flight": lane.in_flight,
+                    "requests": lane.requests,
+                    "batches": lane.batches,
+                    "avg_batch_size": lane.requests / lane.batches if lane.batches else 0.0,
+                    "avg_wait_ms": 1000 * lane.total_wait / lane.requests if lane.requests else 0.0,
+                    "max_wait_ms": 1000 * lane.max_wait,
+                }
+                for model, lane in self._lanes.items()
+            }
+        # Read on the dispatcher loop so the numbers are consistent
+        return asyncio.run_coroutine_threadsafe(_call(collect), self._loop).result()
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+async def _call(fn):
+    return fn()
+
+def _estimate_tokens(request: Dict[str, Any]) -> float:
+    # ~4 characters per token for the prompt, plus the completion budget
+    prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+    return prompt_chars / 4 + request.get("max_tokens", 0)
+
+_dispatcher: Optional[LLMDispatcher] = None
+
+def configure_dispatcher(**kwargs) -> LLMDispatcher:
+    """Route all non-streaming LLM node calls through a shared LLMDispatcher."""
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.close()
+    _dispatcher = LLMDispatcher(**kwargs)
+    return _dispatcher
+
+def get_dispatcher() -> Optional[LLMDispatcher]:
+    return _dispatcher
@@ -1,31 +1,142 @@
-import time
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
+
+# (event, node_id, data) -> None, see WorkflowEngine
+EventCallback = Callable[[str, str, Any], None]
+
+class NodeCancelled(Exception):
+    """Raised inside a node that noticed its result is no longer wanted."""
+
+# Guards BaseNode.stream_owner, claimed from the threads running attempts,
+# and the lazily created BaseNode.cancelled
+_stream_lock = threading.Lock()
 
 class BaseNode(ABC):
+    # Deterministic nodes whose results the engine may cache by resolved
+    # inputs; overridden per node with `cache:` in the DSL
+    cacheable = False
+    # Output depends only on config and inputs and running it has no side
+    # effects, so the engine may reuse a memoized output across runs;
+    # overridden per node with `memoize:` in the DSL
+    pure = False
+    # Scheduler concurrency pool the node runs in; overridden per node with
+    # `resource:` in the DSL, caps are set with the top-level `resources:`
+    resource_class = "default"
+    # Finishes in microseconds, so the engine runs it on the scheduler
+    # thread instead of paying for a pool hop; overridden with `inline:`
+    inline = False
+    # "thread" or "process" (a warm worker process, for CPU-bound nodes the
+    # GIL would serialize); overridden with `executor:` per node or the
+    # top-level `executors:` per node type
+    executor = "thread"
+    # Running it twice is harmless, so `hedge:` in the DSL may send a
+    # duplicate of a slow call (see runtime/core/resilience.py)
+    idempotent = False
+
     def __init__(self, node_id: str, config: Dict[str, Any]):
         self.node_id = node_id
         self.config = config
+        self.on_event: Optional[EventCallback] = None  # set by the engine
+        self._cancelled: Optional[threading.Event] = None
+        self.retrying = False  # more attempts follow: raise instead of degrading
+        self.stream_owner: Optional["BaseNode"] = None  # the attempt whose tokens went out
+        self._attempts = []
+
+    @property
+    def cancelled(self) -> threading.Event:
+        # Set when the run failed, the node timed out or lost a hedge race;
+        # long-running nodes check it (see wait) and stop early. Created on
+        # first use: most nodes finish without anyone looking at it.
+        if self._cancelled is None:
+            with _stream_lock:
+                if self._cancelled is None:
+                    self._cancelled = threading.Event()
+        return self._cancelled
+
+    def cancel(self):
+        self.cancelled.set()
+        for attempt in self._attempts:
+            attempt.cancel()
+
+    def fork(self) -> "BaseNode":
+        """A fresh instance for a retried or hedged attempt, cancelled along with this one."""
+        attempt = type(self)(self.node_id, self.config)
+        attempt.on_event = lambda event, node_id, data: self._forward(attempt, event, data)
+        self._attempts.append(attempt)
+        if self.cancelled.is_set():
+            attempt.cancel()
+        return attempt
+
+    def _forward(self, attempt: "BaseNode", event: str, data: Any):
+        if event == "token":
+            # The first attempt to stream owns the output: the others are
+            # cancelled and their tokens dropped, and the owner can no longer
+            # be retried since its tokens are already out
+            with _stream_lock:
+                if self.stream_owner is None:
+                    self.stream_owner = attempt
+                    attempt.retrying = False
+                    for other in self._attempts:
+                        if other is not attempt:
+                            other.cancel()
+                elif self.stream_owner is not attempt:
+                    return
+        self.emit(event, data)
+
+    def check_cancelled(self):
+        if self._cancelled is not None and self._cancelled.is_set():
+            raise NodeCancelled(self.node_id)
+
+    def wait(self, seconds: float):
+        # time.sleep that gives up as soon as the node is cancelled
+        if self.cancelled.wait(seconds):
+            raise NodeCancelled(self.node_id)
+
+    def emit(self, event: str, data: Any = None):
+        # Called from the worker thread / task running the node
+        if self.on_event:
+            self.on_event(event, self.node_id, data)
 
     @abstractmethod
     def run(self, inputs: Dict[str, Any]) -> Any:
         pass
 
+    async def arun(self, inputs: Dict[str, Any]) -> Any:
+        # Sync-only nodes are offloaded to a worker thread; nodes that wait
+        # on I/O override this with a native coroutine.
+        return await asyncio.to_thread(self.run, inputs)
+
 class SleepNode(BaseNode):
+    resource_class = "io"
+
     def run(self, inputs: Dict[str, Any]) -> Any:
         duration = float(inputs.get("duration", 1))
         print(f"[{self.node_id}] Sleeping for {duration} seconds...")
-        time.sleep(duration)
+        self.wait(duration)
+        print(f"[{self.node_id}] Woke up!")
+        return {"status": "slept", "duration": duration}
+
+    async def arun(self, inputs: Dict[str, Any]) -> Any:
+        duration = float(inputs.get("duration", 1))
+        print(f"[{self.node_id}] Sleeping for {duration} seconds...")
+        await asyncio.sleep(duration)
         print(f"[{self.node_id}] Woke up!")
         return {"status": "slept", "duration": duration}
 
 class PrintNode(BaseNode):
+    inline = True
+
     def run(self, inputs: Dict[str, Any]) -> Any:
         message = inputs.get("message", "")
         print(f"[{self.node_id}] OUTPUT: {message}")
         return {"printed": message}
 
 class MathNode(BaseNode):
+    pure = True
+    inline = True
+
     def run(self, inputs: Dict[str, Any]) -> Any:
         a = float(inputs.get("a", 0))
         b = float(inputs.get("b", 0))
@@ -46,6 +157,9 @@ class MathNode(BaseNode):
 
 
 class IntentClassifierNode(BaseNode):
+    pure = True
+    inline = True
+
     def run(self, inputs: Dict[str, Any]) -> Any:
         query = inputs.get("query", "").lower()
         categories = inputs.get("categories", [])
@@ -62,6 +176,9 @@ class IntentClassifierNode(BaseNode):
         return {"category": category}
 
 class RouterNode(BaseNode):
+    pure = True
+    inline = True
+
     def run(self, inputs: Dict[str, Any]) -> Any:
         # Router just passes through, the branching happens in next nodes' conditions
         intent = inputs.get("intent")
@@ -69,7 +186,11 @@ class RouterNode(BaseNode):
         return {"intent": intent}
 
 class MockSearchNode(BaseNode):
-    def run(self, inputs: Dict[str, Any]) -> Any:
+    cacheable = True
+    resource_class = "io"
+    idempotent = True
+
+    def _start(self, inputs: Dict[str, Any]):
         query = inputs.get("query", "")
         source = inputs.get("source", "unknown")
         duration = float(inputs.get("duration", 0.5))
@@ -77,8 +198,9 @@ class MockSearchNode(BaseNode):
         import datetime
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] [{self.node_id}] Searching {source} for '{query}' (taking {duration}s)...")
-        time.sleep(duration)
-        
+        return source, duration
+
+    def _results(self, source: str) -> Any:
         # Mock results
         if source == "official_docs":
             results = "Official Docs: EC2 instance troubleshooting guide. Check security groups."
@@ -89,6 +211,16 @@ class MockSearchNode(BaseNode):
             
         return {"results": results}
 
+    def run(self, inputs: Dict[str, Any]) -> Any:
+        source, duration = self._start(inputs)
+        self.wait(duration)
+        return self._results(source)
+
+    async def arun(self, inputs: Dict[str, Any]) -> Any:
+        source, duration = self._start(inputs)
+        await asyncio.sleep(duration)
+        return self._results(source)
+
 NODE_CLASSES = {
     "sleep": SleepNode,
     "print": PrintNode,
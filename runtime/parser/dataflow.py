@@ -0,0 +1,71 @@
+import re
+from typing import Any, Dict, Iterator, List, Set
+
+from jinja2 import TemplateSyntaxError, meta
+
+from ..core.templates import template_cache
+
+# Fallback for templates Jinja can't parse: plain {{ node.field }} reads
+_VARIABLE_PATTERN = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\.[a-zA-Z0-9_]+\s*\}\}")
+
+def _template_sources(obj: Any) -> Iterator[str]:
+    if isinstance(obj, str):
+        if "{{" in obj or "{%" in obj:
+            yield obj
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from _template_sources(v)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _template_sources(v)
+
+def template_names(source: str) -> Set[str]:
+    """Top-level names a template reads, from its Jinja AST (filters, calls, loops and all)."""
+    try:
+        return meta.find_undeclared_variables(template_cache.env.parse(source))
+    except TemplateSyntaxError:
+        return set(_VARIABLE_PATTERN.findall(source))
+
+def input_dependencies(node_config: Dict[str, Any], node_ids) -> Set[str]:
+    """Nodes whose outputs the node's inputs read."""
+    names: Set[str] = set()
+    for source in _template_sources(node_config.get("inputs", {})):
+        names |= template_names(source)
+    return {name for name in names if name != "inputs" and name in node_ids}
+
+def condition_dependencies(node_config: Dict[str, Any], node_ids) -> Set[str]:
+    """Nodes whose outputs the node's condition reads."""
+    if not isinstance(node_config.get("condition"), str):
+        return set()
+    return {name for name in template_names(node_config["condition"]) if name != "inputs" and name in node_ids}
+
+def data_dependencies(node_config: Dict[str, Any], node_ids) -> Set[str]:
+    """Nodes whose outputs the node's inputs or condition read."""
+    return input_dependencies(node_config, node_ids) | condition_dependencies(node_config, node_ids)
+
+def is_pure(node_config: Dict[str, Any]) -> bool:
+    from ..nodes import NODE_CLASSES
+    from ..nodes.simple import BaseNode
+
+    return NODE_CLASSES.get(node_config.get("type"), BaseNode).pure
+
+def dead_nodes(nodes_config: Dict[str, Any], dependencies: Dict[str, Set[str]]) -> List[str]:
+    """
+    Pure nodes nothing live consumes. Live are nodes with side effects,
+    streaming nodes (their tokens are output), `end: true` nodes (or every
+    sink when none is marked) and, transitively, everything they depend on.
+    """
+    consumed = {dep for deps in dependencies.values() for dep in deps}
+    has_end = any(config.get("end") for config in nodes_config.values())
+    stack = [
+        node_id for node_id, config in nodes_config.items()
+        if config.get("end") or config.get("stream") or not is_pure(config)
+        or (not has_end and node_id not in consumed)
+    ]
+    live = set(stack)
+    while stack:
+        for dep in dependencies.get(stack.pop(), ()):
+            if dep in nodes_config and dep not in live:
+                live.add(dep)
+                stack.append(dep)
+    return [node_id for node_id in nodes_config if node_id not in live]
@@ -1,6 +1,23 @@
 import yaml
-import re
-from typing import Dict, List, Any, Set
+import hashlib
+import marshal
+import os
+import pickle
+import sys
+from typing import Dict, List, Any, Optional, Set, Tuple
+import jinja2
+from jinja2 import Template, TemplateSyntaxError, meta, nodes
+
+from ..core.templates import template_cache
+from ..core.conditions import CompiledCondition
+from .dataflow import data_dependencies, dead_nodes
+from .plan import ExecutionPlan, WorkflowCompileError, build_plan
+
+# Bump when the pickled WorkflowGraph layout changes
+PLAN_CACHE_FORMAT = 5
+
+_RUNTIME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_source_hash: Optional[str] = None
 
 class WorkflowGraph:
     def __init__(self, workflow_id: str, version: str, start_node: str, 
@@ -12,6 +29,93 @@ class WorkflowGraph:
         self.nodes = nodes
         self.dependencies = dependencies
         self.execution_order = execution_order  # node_id -> [next_node_ids]
+        self.templates: Dict[str, Template] = {}  # template source -> compiled template
+        self.conditions: Dict[str, CompiledCondition] = {}  # condition source -> compiled condition
+        # node_id -> top-level names its inputs/condition read (None = unknown, read everything)
+        self.references: Dict[str, Optional[Set[str]]] = {}
+        # node_id -> (name, field) pairs read, e.g. ("inputs", "query"); field None = whole value
+        self.field_references: Dict[str, Optional[Set[Tuple[str, Any]]]] = {}
+        self.resources: Dict[str, Any] = {}  # resource class -> concurrency cap, from `resources:`
+        self.executors: Dict[str, str] = {}  # node type -> "thread" | "process", from `executors:`
+        self.dataflow = False  # edges from data flow only, from `dataflow:`
+        self.pruned: List[str] = []  # pure nodes nothing consumed, dropped at compile time
+        self.plan: Optional[ExecutionPlan] = None  # set by parse_workflow
+
+    def __getstate__(self):
+        # Compiled templates and conditions don't pickle: store template
+        # bytecode and condition sources, and rebuild them on load
+        state = self.__dict__.copy()
+        state["templates"] = {source: marshal.dumps(template_cache.code(source)) for source in self.templates}
+        state["conditions"] = list(self.conditions)
+        return state
+
+    def __setstate__(self, state):
+        templates = state.pop("templates")
+        conditions = state.pop("conditions")
+        self.__dict__.update(state)
+        self.templates = {source: template_cache.from_code(source, marshal.loads(code))
+                          for source, code in templates.items()}
+        self.conditions = {source: CompiledCondition(source) for source in conditions}
+
+    def get_template(self, source: str) -> Template:
+        template = self.templates.get(source)
+        if template is None:
+            template = template_cache.get(source)
+            self.templates[source] = template
+        else:
+            template_cache.record_hit()
+        return template
+
+    def get_condition(self, source: str) -> CompiledCondition:
+        condition = self.conditions.get(source)
+        if condition is None:
+            condition = CompiledCondition(source)
+            self.conditions[source] = condition
+        return condition
+
+    def precompile_templates(self):
+        # Compile every input template and condition up front so runs and
+        # chat turns only ever render / evaluate. Also record which memory
+        # keys each node reads, so the engine can hand it a scoped view.
+        for node_id, config in self.nodes.items():
+            references: Optional[Set[str]] = set()
+            field_references: Set[Tuple[str, Any]] = set()
+
+            sources = [v for v in config.get("inputs", {}).values() if isinstance(v, str) and "{{" in v]
+            if config.get("condition"):
+                self.get_condition(config["condition"])
+                sources.append(config["condition"])
+
+            for source in sources:
+                try:
+                    if source not in self.templates:
+                        self.templates[source] = template_cache.get(source)
+                    if references is not None:
+                        ast = template_cache.env.parse(source)
+                        undeclared = meta.find_undeclared_variables(ast)
+                        references |= undeclared
+                        field_references |= {ref for ref in _field_references(ast) if ref[0] in undeclared}
+                except TemplateSyntaxError as e:
+                    # Leave it to the engine, which reports render errors per node
+                    print(f"Error compiling template {source}: {e}")
+                    references = None
+
+            self.references[node_id] = references
+            self.field_references[node_id] = field_references if references is not None else None
+
+def _field_references(node: nodes.Node) -> Set[Tuple[str, Any]]:
+    """(name, field) pairs for `name.field` / `name['field']` reads, (name, None) for bare names."""
+    refs = set()
+    if isinstance(node, nodes.Getattr) and isinstance(node.node, nodes.Name):
+        refs.add((node.node.name, node.attr))
+    elif isinstance(node, nodes.Getitem) and isinstance(node.node, nodes.Name) and isinstance(node.arg, nodes.Const):
+        refs.add((node.node.name, node.arg.value))
+    elif isinstance(node, nodes.Name):
+        refs.add((node.name, None))
+    else:
+        for child in node.iter_child_nodes():
+            refs |= _field_references(child)
+    return refs
 
 def parse_workflow(yaml_content: str) -> WorkflowGraph:
     data = yaml.safe_load(yaml_content)
@@ -21,39 +125,28 @@ def parse_workflow(yaml_content: str) -> WorkflowGraph:
     start_node = data.get("start")
     nodes_config = data.get("nodes", {})
     
+    # `dataflow: true` schedules by data flow alone: `next` / `depends_on`
+    # are still validated but add no edges
+    dataflow = bool(data.get("dataflow", False))
+
     dependencies: Dict[str, Set[str]] = {}
     execution_order: Dict[str, List[str]] = {}
-    
-    # Regex to find {{ node_id.field }} patterns
-    variable_pattern = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\.[a-zA-Z0-9_]+\s*\}\}")
 
     for node_id, config in nodes_config.items():
         # 1. Explicit depends_on
         explicit_deps = set(config.get("depends_on", []))
         
-        # 2. Implicit dependencies from inputs (variable references)
-        inputs = config.get("inputs", {})
-        implicit_deps = set()
-        
-        def find_deps(obj):
-            if isinstance(obj, str):
-                matches = variable_pattern.findall(obj)
-                for match in matches:
-                    if match != "inputs" and match in nodes_config:
-                        implicit_deps.add(match)
-            elif isinstance(obj, dict):
-                for v in obj.values():
-                    find_deps(v)
-            elif isinstance(obj, list):
-                for v in obj:
-                    find_deps(v)
-
-        find_deps(inputs)
+        # 2. Implicit dependencies: every node the inputs and the condition
+        # read, from the Jinja AST (`{{ a.text.strip() }}`, filters, loops)
+        implicit_deps = data_dependencies(config, nodes_config)
         
         # Merge explicit and implicit
         if node_id not in dependencies:
             dependencies[node_id] = set()
-        dependencies[node_id].update(explicit_deps | implicit_deps)
+        dependencies[node_id].update(implicit_deps if dataflow else explicit_deps | implicit_deps)
+        if dataflow:
+            # Undefined nodes still have to be reported
+            dependencies[node_id].update(dep for dep in explicit_deps if dep not in nodes_config)
         
         # Parse 'next' for execution order
         next_nodes = config.get("next", [])
@@ -68,6 +161,87 @@ def parse_workflow(yaml_content: str) -> WorkflowGraph:
             # So we'll do a second pass or use a temporary map
             if target_node not in dependencies:
                 dependencies[target_node] = set()
-            dependencies[target_node].add(node_id)
+            if not dataflow or target_node not in nodes_config:
+                dependencies[target_node].add(node_id)
+
+    # Drop pure nodes whose results nothing live reads; `prune: false` keeps them
+    pruned = dead_nodes(nodes_config, dependencies) if data.get("prune", True) else []
+    if pruned:
+        nodes_config = {node_id: config for node_id, config in nodes_config.items() if node_id not in pruned}
+        dependencies = {node_id: {dep for dep in deps if dep not in pruned}
+                        for node_id, deps in dependencies.items() if node_id not in pruned}
+        execution_order = {node_id: [n for n in targets if n not in pruned]
+                           for node_id, targets in execution_order.items() if node_id not in pruned}
+
+    graph = WorkflowGraph(workflow_id, version, start_node, nodes_config, dependencies, execution_order)
+    graph.resources = data.get("resources", {})
+    graph.executors = data.get("executors", {})
+    graph.dataflow = dataflow
+    graph.pruned = pruned
+    graph.precompile_templates()
+    graph.plan = build_plan(graph, dsl_hash(yaml_content))
+    return graph
+
+def dsl_hash(yaml_content: str) -> str:
+    return hashlib.sha256(yaml_content.encode()).hexdigest()
+
+def runtime_source_hash() -> str:
+    """
+    Hash of every runtime/*.py file. Plans depend on code as well as the
+    DSL (node class attributes such as `pure` or `resource_class`, the
+    dataflow and pruning passes), so any source change invalidates them.
+    """
+    global _source_hash
+    if _source_hash is None:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(_RUNTIME_DIR):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, _RUNTIME_DIR).encode())
+                    with open(path, "rb") as f:
+                        digest.update(f.read())
+        _source_hash = digest.hexdigest()
+    return _source_hash
+
+def default_plan_cache_dir() -> str:
+    # Per-user, not the working directory: plans are unpickled on load, so
+    # the directory must only be writable by the user running the runtime
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dify-runtime", "plans")
+
+def compile_workflow(yaml_content: str, cache_dir: Optional[str] = None) -> WorkflowGraph:
+    """
+    parse_workflow, with the compiled graph (plan, templates, references)
+    cached in `cache_dir` keyed by the DSL hash and the runtime's source,
+    so reloading an unchanged workflow skips YAML parsing, dependency
+    extraction and template compilation. No cache_dir, no caching. Raises
+    WorkflowCompileError for cycles, undefined nodes and unknown node types.
+    """
+    if not cache_dir:
+        return parse_workflow(yaml_content)
+
+    # Template bytecode is only valid for the Python / Jinja2 that made it
+    path = os.path.join(cache_dir, f"{dsl_hash(yaml_content)}-py{sys.version_info[0]}{sys.version_info[1]}.plan")
+    tag = (PLAN_CACHE_FORMAT, jinja2.__version__, runtime_source_hash())
+    try:
+        with open(path, "rb") as f:
+            cached_tag, graph = pickle.load(f)
+        if cached_tag == tag:
+            return graph
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ignoring unreadable plan cache {path}: {e}")
 
-    return WorkflowGraph(workflow_id, version, start_node, nodes_config, dependencies, execution_order)
+    graph = parse_workflow(yaml_content)
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((tag, graph), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)  # readers never see a partial file
+    except OSError as e:
+        print(f"Could not write plan cache {path}: {e}")
+    return graph
@@ -0,0 +1,122 @@
+from typing import Dict, List, NamedTuple, Tuple
+
+from ..nodes import NODE_CLASSES
+from .dataflow import condition_dependencies, input_dependencies
+
+class WorkflowCompileError(ValueError):
+    """The DSL describes a graph that can never run (cycle, undefined node, unknown type)."""
+
+class ExecutionPlan(NamedTuple):
+    """
+    Immutable, integer-indexed form of a workflow graph, built once per
+    DSL and shared by every run. Node `i` is `node_ids[i]`; adjacency,
+    in-degrees and priorities are tuples indexed the same way, so a run
+    only copies `in_degrees` to start scheduling.
+    """
+    dsl_hash: str
+    node_ids: Tuple[str, ...]
+    index: Dict[str, int]  # node_id -> i (treat as read-only)
+    topo_order: Tuple[int, ...]
+    successors: Tuple[Tuple[int, ...], ...]
+    predecessors: Tuple[Tuple[int, ...], ...]
+    in_degrees: Tuple[int, ...]
+    levels: Tuple[Tuple[int, ...], ...]  # nodes that can run in parallel, by depth
+    critical_path: Tuple[int, ...]  # nodes on the longest chain starting at i
+    # Early condition evaluation: conditions that read i, and how many nodes
+    # each node's condition reads (decidable once those completed)
+    condition_watchers: Tuple[Tuple[int, ...], ...]
+    condition_reads: Tuple[int, ...]
+    # `speculative: true` nodes start once their inputs' nodes completed:
+    # speculative nodes whose inputs read i, and input reads per node (-1: not speculative)
+    start_watchers: Tuple[Tuple[int, ...], ...]
+    start_reads: Tuple[int, ...]
+
+def build_plan(graph: "WorkflowGraph", dsl_hash: str) -> ExecutionPlan:
+    """Validate `graph` and index it; raises WorkflowCompileError listing every problem."""
+    dependencies = graph.dependencies
+    node_ids = tuple(graph.nodes)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    errors = []
+    for node_id, config in graph.nodes.items():
+        if config.get("type") not in NODE_CLASSES:
+            errors.append(f"'{node_id}' has unknown type '{config.get('type')}'")
+    for node_id, deps in dependencies.items():
+        if node_id not in index:
+            # Only `next:` can name a node that doesn't exist as a dependent
+            sources = sorted(dep for dep in deps if node_id in graph.execution_order.get(dep, []))
+            errors.append(f"'{', '.join(sources)}' lists undefined node '{node_id}' in next")
+            continue
+        for dep in sorted(deps):
+            if dep not in index:
+                errors.append(f"'{node_id}' depends on undefined node '{dep}'")
+    for node_id, refs in graph.field_references.items():
+        for name, field in sorted(refs or (), key=repr):
+            # `{{ name.field }}` must read a node output or the workflow inputs
+            if field is not None and name != "inputs" and name not in index:
+                errors.append(f"'{node_id}' references undefined node '{name}' ({{{{ {name}.{field} }}}})")
+    if errors:
+        raise WorkflowCompileError("Invalid workflow:\n  " + "\n  ".join(errors))
+
+    successors: List[List[int]] = [[] for _ in node_ids]
+    predecessors: List[List[int]] = [[] for _ in node_ids]
+    for node_id, i in index.items():
+        for dep in sorted(dependencies.get(node_id, ()), key=index.__getitem__):
+            successors[index[dep]].append(i)
+            predecessors[i].append(index[dep])
+    in_degrees = tuple(len(preds) for preds in predecessors)
+
+    # Kahn's algorithm; whatever is left over sits on a cycle
+    remaining = list(in_degrees)
+    topo_order = [i for i, degree in enumerate(in_degrees) if degree == 0]
+    for i in topo_order:  # grows while iterating
+        for succ in successors[i]:
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                topo_order.append(succ)
+    if len(topo_order) < len(node_ids):
+        cyclic = [node_ids[i] for i, degree in enumerate(remaining) if degree > 0]
+        raise WorkflowCompileError(f"Invalid workflow: dependency cycle among {', '.join(cyclic)}")
+
+    depth = [0] * len(node_ids)
+    for i in topo_order:
+        depth[i] = 1 + max((depth[pred] for pred in predecessors[i]), default=-1)
+    levels: List[List[int]] = [[] for _ in range(max(depth, default=-1) + 1)]
+    for i in topo_order:
+        levels[depth[i]].append(i)
+
+    critical_path = [0] * len(node_ids)
+    for i in reversed(topo_order):
+        critical_path[i] = 1 + max((critical_path[succ] for succ in successors[i]), default=0)
+
+    condition_watchers: List[List[int]] = [[] for _ in node_ids]
+    condition_reads = [0] * len(node_ids)
+    start_watchers: List[List[int]] = [[] for _ in node_ids]
+    start_reads = [-1] * len(node_ids)
+    for node_id, i in index.items():
+        config = graph.nodes[node_id]
+        reads = condition_dependencies(config, index)
+        condition_reads[i] = len(reads)
+        for name in reads:
+            condition_watchers[index[name]].append(i)
+        if config.get("speculative"):
+            reads = input_dependencies(config, index)
+            start_reads[i] = len(reads)
+            for name in reads:
+                start_watchers[index[name]].append(i)
+
+    return ExecutionPlan(
+        dsl_hash=dsl_hash,
+        node_ids=node_ids,
+        index=index,
+        topo_order=tuple(topo_order),
+        successors=tuple(map(tuple, successors)),
+        predecessors=tuple(map(tuple, predecessors)),
+        in_degrees=in_degrees,
+        levels=tuple(map(tuple, levels)),
+        critical_path=tuple(critical_path),
+        condition_watchers=tuple(map(tuple, condition_watchers)),
+        condition_reads=tuple(condition_reads),
+        start_watchers=tuple(map(tuple, start_watchers)),
+        start_reads=tuple(start_reads),
+    )
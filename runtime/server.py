@@ -0,0 +1,213 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from .core.async_engine import AsyncWorkflowEngine
+from .memory.memory import GlobalMemory
+from .memory.memo import MemoStore
+from .memory.result_cache import ResultCache
+from .parser.dsl_parser import WorkflowGraph, compile_workflow
+from .parser.plan import WorkflowCompileError
+
+class WorkflowRegistry:
+    """Compiled workflows by id; compiled once, shared by every request."""
+
+    def __init__(self, plan_cache: Optional[str] = None):
+        self.plan_cache = plan_cache
+        self._graphs: Dict[str, WorkflowGraph] = {}
+        self._lock = threading.Lock()
+
+    def add(self, graph: WorkflowGraph):
+        with self._lock:
+            self._graphs[graph.workflow_id] = graph
+
+    def register(self, yaml_content: str) -> WorkflowGraph:
+        graph = compile_workflow(yaml_content, self.plan_cache)
+        self.add(graph)
+        return graph
+
+    def load(self, path: str) -> WorkflowGraph:
+        with open(path, "r") as f:
+            return self.register(f.read())
+
+    def get(self, workflow_id: str) -> Optional[WorkflowGraph]:
+        return self._graphs.get(workflow_id)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            graphs = list(self._graphs.values())
+        return [
+            {"id": g.workflow_id, "version": g.version, "nodes": len(g.nodes), "levels": len(g.plan.levels)}
+            for g in graphs
+        ]
+
+class WorkflowServer(ThreadingHTTPServer):
+    """
+    Long-running HTTP front end for the runtime. Request threads parse and
+    respond; every run executes on one shared event loop (AsyncWorkflowEngine),
+    together with the warm graphs, LLM clients, result cache and memo store.
+
+        GET  /health
+        GET  /workflows                      registered workflows
+        POST /workflows                      register a workflow (YAML body)
+        POST /workflows/<id>/run             {"inputs": {...}, "stream": false}
+
+    With "stream": true the response is NDJSON: one line per engine event
+    (node_started, node_completed, token, ...) and a final "result" line.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, registry: WorkflowRegistry, result_cache: Optional[ResultCache] = None,
+                 memo: Optional[MemoStore] = None):
+        # Before binding: a failed bind calls server_close(), which stops the loop
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="workflow-runs", daemon=True)
+        self._loop_thread.start()
+        self.registry = registry
+        self.result_cache = result_cache
+        self.memo = memo
+        super().__init__(address, WorkflowRequestHandler)
+
+    def start_run(self, graph: WorkflowGraph, inputs: Dict[str, Any], on_event=None):
+        """Schedule a run on the shared loop; returns (memory, concurrent future)."""
+        memory = GlobalMemory({"inputs": inputs})
+        engine = AsyncWorkflowEngine(graph, memory, on_event=on_event,
+                                     result_cache=self.result_cache, memo=self.memo)
+        return memory, asyncio.run_coroutine_threadsafe(engine.arun(), self.loop)
+
+    def server_close(self):
+        super().server_close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join(timeout=5)
+
+class WorkflowRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive; streamed responses are chunked
+    # Headers and body are separate writes; with Nagle on, the body waits for
+    # the client's delayed ACK (~40ms) on every keep-alive request but the first
+    disable_nagle_algorithm = True
+    server: WorkflowServer
+
+    def log_message(self, format, *args):
+        pass  # one line per request drowns out the node logs
+
+    def _send_json(self, status: int, body: Any):
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/workflows":
+            self._send_json(200, self.server.registry.describe())
+        else:
+            self._send_json(404, {"error": f"not found: {self.path}"})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        if parts == ["workflows"]:
+            try:
+                graph = self.server.registry.register(self._read_body().decode())
+            except WorkflowCompileError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(400, {"error": f"invalid workflow: {e}"})
+                return
+            self._send_json(201, {"id": graph.workflow_id, "nodes": len(graph.nodes)})
+        elif len(parts) == 3 and parts[0] == "workflows" and parts[2] == "run":
+            self._run(parts[1])
+        else:
+            self._send_json(404, {"error": f"not found: {self.path}"})
+
+    def _run(self, workflow_id: str):
+        graph = self.server.registry.get(workflow_id)
+        if graph is None:
+            self._send_json(404, {"error": f"unknown workflow: {workflow_id}"})
+            return
+        try:
+            body = json.loads(self._read_body() or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": f"invalid JSON: {e}"})
+            return
+
+        inputs = body.get("inputs", {}) if isinstance(body, dict) else None
+        if not isinstance(inputs, dict):
+            self._send_json(400, {"error": 'expected a JSON object like {"inputs": {...}}'})
+            return
+
+        run_id = str(uuid.uuid4())
+        if body.get("stream"):
+            self._run_streaming(run_id, graph, inputs)
+            return
+
+        start = time.perf_counter()
+        memory, future = self.server.start_run(graph, inputs)
+        self._send_json(200, self._result(run_id, memory, future, start))
+
+    def _result(self, run_id: str, memory: GlobalMemory, future, start: float) -> Dict[str, Any]:
+        result = {"run_id": run_id, "status": "COMPLETED"}
+        try:
+            future.result()
+        except Exception as e:
+            result["status"] = "FAILED"
+            result["error"] = str(e)
+        result["duration"] = round(time.perf_counter() - start, 6)
+        result["memory"] = memory.to_dict()
+        return result
+
+    def _run_streaming(self, run_id: str, graph: WorkflowGraph, inputs: Dict[str, Any]):
+        # Events arrive from the loop and worker threads; this request
+        # thread drains them to the socket until the run is done
+        events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+
+        def on_event(event, node_id, data):
+            events.put({"event": event, "node_id": node_id, "data": data})
+
+        start = time.perf_counter()
+        memory, future = self.server.start_run(graph, inputs, on_event)
+        future.add_done_callback(lambda f: events.put(None))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                self._write_chunk(event)
+            self._write_chunk({"event": "result", **self._result(run_id, memory, future, start)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            future.cancel()  # client went away
+            self.close_connection = True
+
+    def _write_chunk(self, record: Dict[str, Any]):
+        data = (json.dumps(record, default=str) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+def serve(registry: WorkflowRegistry, host: str = "127.0.0.1", port: int = 8000,
+          result_cache: Optional[ResultCache] = None, memo: Optional[MemoStore] = None):
+    server = WorkflowServer((host, port), registry, result_cache, memo)
+    print(f"Serving {', '.join(w['id'] for w in registry.describe())} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from runtime.batch import run_batch
+from runtime.parser.dsl_parser import parse_workflow
+
+WORKFLOW = """
+id: add
+nodes:
+  add:
+    type: math
+    inputs:
+      a: "{{ inputs.a }}"
+      b: "{{ inputs.b }}"
+      op: add
+"""
+
+class BadRowTest(unittest.TestCase):
+    def test_bad_rows_fail_on_their_own(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            batch_path = os.path.join(tmp, "rows.jsonl")
+            output_path = os.path.join(tmp, "results.jsonl")
+            with open(batch_path, "w") as f:
+                f.write('{"a": 1, "b": 2}\n[1, 2]\n{"a": 3,\n\n{"inputs": {"a": 5, "b": 6}}\n')
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = run_batch(parse_workflow(WORKFLOW), batch_path, output_path,
+                                    concurrency=2, preserve_order=True)
+            with open(output_path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(summary["runs"], 4)
+        self.assertEqual(summary["failed"], 2)
+        self.assertEqual([r["status"] for r in records], ["COMPLETED", "FAILED", "FAILED", "COMPLETED"])
+        self.assertEqual([r.get("line") for r in records[1:3]], [2, 3])
+        self.assertIn("expected a JSON object", records[1]["error"])
+        self.assertEqual(records[3]["memory"]["add"]["result"], 11.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from runtime.parser import dsl_parser
+from runtime.parser.dsl_parser import compile_workflow, parse_workflow
+from runtime.parser.plan import WorkflowCompileError
+
+WORKFLOW = """
+id: add
+nodes:
+  add:
+    type: math
+    inputs:
+      a: "{{ inputs.a }}"
+      b: 2
+      op: add
+  show:
+    type: print
+    inputs:
+      message: "{{ add.result }}"
+"""
+
+class CompileErrorTest(unittest.TestCase):
+    def assertCompileError(self, yaml_content: str, *messages: str):
+        with self.assertRaises(WorkflowCompileError) as caught:
+            parse_workflow(yaml_content)
+        for message in messages:
+            self.assertIn(message, str(caught.exception))
+
+    def test_unknown_node_type(self):
+        self.assertCompileError("""
+id: bad
+nodes:
+  a: {type: teleport}
+""", "'a' has unknown type 'teleport'")
+
+    def test_bad_references(self):
+        # Every problem is reported at once
+        self.assertCompileError("""
+id: bad
+nodes:
+  a:
+    type: print
+    depends_on: [ghost]
+    next: [phantom]
+    inputs:
+      message: "{{ spectre.text }}"
+""", "'a' depends on undefined node 'ghost'", "'a' lists undefined node 'phantom' in next",
+            "'a' references undefined node 'spectre'")
+
+    def test_cycle(self):
+        self.assertCompileError("""
+id: bad
+nodes:
+  a: {type: print, depends_on: [c]}
+  b: {type: print, depends_on: [a]}
+  c: {type: print, depends_on: [b]}
+  d: {type: print}
+""", "dependency cycle among a, b, c")
+
+    def test_valid_workflow_compiles(self):
+        graph = parse_workflow(WORKFLOW)
+        self.assertEqual([graph.plan.node_ids[i] for i in graph.plan.topo_order], ["add", "show"])
+
+class PlanCacheTest(unittest.TestCase):
+    def compile(self, cache_dir: str):
+        with mock.patch.object(dsl_parser, "parse_workflow", wraps=parse_workflow) as parse:
+            graph = compile_workflow(WORKFLOW, cache_dir)
+        return graph, parse.call_count
+
+    def test_cached_plan_is_reused_until_the_runtime_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "plans")
+            graph, parses = self.compile(cache_dir)
+            self.assertEqual(parses, 1)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertEqual(os.stat(cache_dir).st_mode & 0o777, 0o700)
+
+            cached, parses = self.compile(cache_dir)
+            self.assertEqual(parses, 0)
+            self.assertEqual(cached.plan, graph.plan)
+
+            # Any runtime source change invalidates every cached plan
+            with mock.patch.object(dsl_parser, "_source_hash", "changed"):
+                _, parses = self.compile(cache_dir)
+                self.assertEqual(parses, 1)
+                _, parses = self.compile(cache_dir)
+                self.assertEqual(parses, 0)
+            _, parses = self.compile(cache_dir)
+            self.assertEqual(parses, 1)
+
+    def test_unreadable_cache_file_is_recompiled(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.compile(tmp)
+            [name] = os.listdir(tmp)
+            with open(os.path.join(tmp, name), "wb") as f:
+                f.write(b"not a pickle")
+            with contextlib.redirect_stdout(io.StringIO()):
+                graph, parses = self.compile(tmp)
+            self.assertEqual(parses, 1)
+            self.assertEqual(graph.plan.node_ids, ("add", "show"))
+
+    def test_no_cache_dir_means_no_caching(self):
+        _, parses = self.compile(None)
+        self.assertEqual(parses, 1)
+
+if __name__ == "__main__":
+    unittest.main()
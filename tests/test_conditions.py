@@ -0,0 +1,80 @@
+import contextlib
+import glob
+import io
+import unittest
+
+from runtime.core.conditions import CompiledCondition
+from runtime.memory.memory import GlobalMemory
+from runtime.parser.dsl_parser import parse_workflow
+
+def memory(**values):
+    return GlobalMemory({"inputs": {}, **values})
+
+def fallback(source: str) -> CompiledCondition:
+    # The render-in-the-sandbox path, as taken by conditions that don't compile
+    condition = CompiledCondition(source)
+    condition._evaluate = None
+    return condition
+
+def evaluate(condition: CompiledCondition, mem: GlobalMemory) -> bool:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return condition.evaluate(mem)
+
+class User:
+    def __init__(self):
+        self._secret = "hunter2"
+        self.name = "ann"
+
+class CompiledConditionTest(unittest.TestCase):
+    def test_private_attributes_are_never_compiled_or_leaked(self):
+        for source in ("{{ user._secret == 'hunter2' }}", "{{ user.__class__.__name__ == 'User' }}"):
+            condition = CompiledCondition(source)
+            self.assertFalse(condition.is_compiled, source)
+            self.assertFalse(evaluate(condition, memory(user=User())), source)
+
+    def test_unsafe_calls_and_filters_fall_back_to_the_sandbox(self):
+        for source in ("{{ user.name.format(1) }}", "{{ range(3) | list }}", "{{ x | join(',') == 'a,b' }}",
+                       "{{ cycler.__init__.__globals__ }}"):
+            self.assertFalse(CompiledCondition(source).is_compiled, source)
+        mem = memory(user=User(), x=["a", "b"])
+        self.assertTrue(evaluate(CompiledCondition("{{ x | join(',') == 'a,b' }}"), mem))
+        self.assertFalse(evaluate(CompiledCondition("{{ cycler.__init__.__globals__ }}"), mem))
+
+    def test_missing_values_and_string_results_match_the_fallback(self):
+        cases = [
+            ("{{ 'x' in missing.text }}", memory()),
+            ("{{ 'x' not in missing.text }}", memory()),
+            ("{{ 'x' not in checker.text }}", memory(checker={})),
+            ("{{ checker.text }}", memory(checker={"text": "False"})),
+            ("{{ checker.text }}", memory(checker={"text": "True"})),
+            ("{{ checker.text }}", memory(checker={"text": "not a literal"})),
+            ("{{ checker.count > 2 }}", memory(checker={"count": 3})),
+        ]
+        for source, mem in cases:
+            compiled = CompiledCondition(source)
+            self.assertTrue(compiled.is_compiled, source)
+            self.assertEqual(evaluate(compiled, mem), evaluate(fallback(source), mem), source)
+        self.assertTrue(evaluate(CompiledCondition("{{ 'x' not in checker.text }}"), memory(checker={})))
+        # An explicit None is an empty container too (the sandbox raises TypeError)
+        self.assertTrue(evaluate(CompiledCondition("{{ 'x' not in checker.text }}"), memory(checker={"text": None})))
+        self.assertFalse(evaluate(CompiledCondition("{{ checker.text }}"), memory(checker={"text": "False"})))
+
+    def test_shipped_conditions_match_the_fallback(self):
+        states = [
+            memory(),
+            memory(intent_classifier={}),
+            memory(intent_classifier={"text": "technical_issue"}),
+            memory(intent_classifier={"text": "billing question"}),
+        ]
+        sources = set()
+        for path in glob.glob("dsl/vnext/*.yaml"):
+            with open(path) as f:
+                sources.update(parse_workflow(f.read()).conditions)
+        self.assertTrue(sources)
+        for source in sources:
+            for mem in states:
+                self.assertEqual(evaluate(CompiledCondition(source), mem), evaluate(fallback(source), mem),
+                                 (source, mem.to_dict()))
+
+if __name__ == "__main__":
+    unittest.main()
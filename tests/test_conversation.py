@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("DB_URL", "sqlite://")
+from runtime.db import db
+from runtime.memory import conversation
+from runtime.memory.conversation import ConversationMemory
+from runtime.memory.tokens import count_tokens
+
+class TokenBudgetTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        engine = create_engine(f"sqlite:///{os.path.join(tmp.name, 'chat.db')}")
+        self.addCleanup(engine.dispose)
+        db.Base.metadata.create_all(bind=engine)
+        patcher = mock.patch.object(conversation, "SessionLocal", sessionmaker(bind=engine))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def memory(self, budget: int) -> ConversationMemory:
+        memory = ConversationMemory("chat", token_budget=budget)
+        self.addCleanup(memory.close)
+        return memory
+
+    def test_older_turns_are_folded_into_the_summary(self):
+        memory = self.memory(100)
+        for i in range(12):
+            memory.add_message("user" if i % 2 == 0 else "assistant", f"turn {i} " + "word " * 10)
+        context = memory.get_context()
+        self.assertTrue(context.startswith("Summary of earlier conversation:"))
+        self.assertTrue(context.endswith("assistant: turn 11 " + "word " * 10))
+        self.assertEqual(memory.summaries, 1)
+        self.assertLessEqual(count_tokens(context.split("\n", 1)[1]), 100)
+
+    def test_newest_turn_larger_than_the_window_is_kept_and_cut(self):
+        memory = self.memory(100)  # 75-token window
+        memory.add_message("user", "hello")
+        memory.add_message("assistant", "hi, how can I help?")
+        question = "please read this log: " + "error " * 200 + "why does it fail?"
+        memory.add_message("user", question)
+
+        context = memory.get_context()
+        summary, newest = context.rsplit("\n", 1)
+        self.assertIn("user: hello", summary)
+        self.assertNotIn("please read this log", summary)
+        self.assertTrue(newest.startswith("user: please read this log: error"))
+        self.assertTrue(newest.endswith("..."))
+        self.assertLessEqual(count_tokens(newest[len("user: "):]), 75)
+        # Still the newest turn on the next call, not folded away meanwhile
+        self.assertEqual(memory.get_context().rsplit("\n", 1)[1], newest)
+
+    def test_single_oversized_message(self):
+        memory = self.memory(40)
+        memory.add_message("user", "x " * 500)
+        context = memory.get_context()
+        self.assertEqual(memory.summaries, 0)
+        self.assertTrue(context.startswith("user: x x"))
+        self.assertLessEqual(count_tokens(context[len("user: "):]), 30)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from runtime.parser.dsl_parser import parse_workflow
+
+def pruned(nodes: str, header: str = "") -> list:
+    graph = parse_workflow(f"id: prune\n{header}nodes:\n{nodes}")
+    for node_id in graph.pruned:
+        assert node_id not in graph.nodes and node_id not in graph.plan.index
+    return sorted(graph.pruned)
+
+class DeadNodeTest(unittest.TestCase):
+    def test_unread_pure_node_is_removed(self):
+        self.assertEqual(pruned("""
+  unused: {type: math, inputs: {a: 1, b: 2, op: add}}
+  used: {type: math, inputs: {a: 3, b: 4, op: add}}
+  answer: {type: print, end: true, inputs: {message: "{{ used.result }}"}}
+"""), ["unused"])
+
+    def test_nodes_that_produce_output_are_kept(self):
+        # Side effects (print, llm), a streaming node and, with no end marked, every sink
+        self.assertEqual(pruned("""
+  shout: {type: print, inputs: {message: hi}}
+  reply: {type: llm, stream: true, inputs: {model: mock, prompt: hi}}
+  total: {type: math, inputs: {a: 1, b: 2, op: add}}
+"""), [])
+        self.assertEqual(pruned("""
+  shout: {type: print, inputs: {message: hi}}
+  label: {type: format, stream: true, inputs: {template: "hi"}}
+  done: {type: print, end: true, inputs: {message: bye}}
+"""), [])
+
+    def test_reads_from_conditions_and_blocks_keep_a_node(self):
+        self.assertEqual(pruned("""
+  gate: {type: math, inputs: {a: 1, b: 2, op: add}}
+  items: {type: math, inputs: {a: 3, b: 4, op: add}}
+  dropped: {type: math, inputs: {a: 5, b: 6, op: add}}
+  answer:
+    type: print
+    end: true
+    condition: "{{ gate.result > 2 }}"
+    inputs:
+      message: "{% if items.result %}{% for i in [items.result] %}{{ i }}{% endfor %}{% endif %}"
+"""), ["dropped"])
+
+    def test_dependencies_of_live_nodes_are_kept(self):
+        self.assertEqual(pruned("""
+  a: {type: math, inputs: {a: 1, b: 2, op: add}}
+  b: {type: math, inputs: {a: "{{ a.result }}", b: 2, op: add}}
+  c: {type: math, inputs: {a: "{{ a.result }}", b: 3, op: add}}
+  answer: {type: print, end: true, inputs: {message: "{{ b.result }}"}}
+"""), ["c"])
+
+    def test_prune_false_keeps_everything(self):
+        self.assertEqual(pruned("""
+  unused: {type: math, inputs: {a: 1, b: 2, op: add}}
+  answer: {type: print, end: true, inputs: {message: hi}}
+""", header="prune: false\n"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, inspect, text
+
+os.environ.setdefault("DB_URL", "sqlite://")
+from runtime.db import db
+
+OLD_MESSAGES = """
+CREATE TABLE messages (
+    id VARCHAR PRIMARY KEY,
+    conversation_id VARCHAR NOT NULL,
+    role VARCHAR NOT NULL,
+    content TEXT NOT NULL
+)
+"""
+OLD_CONVERSATIONS = "CREATE TABLE conversations (id VARCHAR PRIMARY KEY, user_id VARCHAR)"
+
+class MigrationTest(unittest.TestCase):
+    def test_old_tables_are_migrated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'old.db')}")
+            with engine.begin() as conn:
+                conn.execute(text(OLD_MESSAGES))
+                conn.execute(text(OLD_CONVERSATIONS))
+                conn.execute(text("INSERT INTO conversations VALUES ('a', NULL)"))
+                for i, conversation in enumerate(["a", "b", "a", "a", "b"]):
+                    conn.execute(text("INSERT INTO messages VALUES (:id, :conv, 'user', :content)"),
+                                 {"id": f"m{i}", "conv": conversation, "content": f"hi {i}"})
+
+            with mock.patch.object(db, "engine", engine), contextlib.redirect_stdout(io.StringIO()):
+                db.init_db()
+                db.init_db()  # second run is a no-op
+
+            with engine.connect() as conn:
+                rows = conn.execute(text("SELECT id, seq FROM messages ORDER BY id")).all()
+                conversation = conn.execute(text("SELECT summary, summarized_seq FROM conversations")).one()
+                tokens = conn.execute(text("SELECT tokens FROM messages")).scalars().all()
+            self.assertEqual(rows, [("m0", 1), ("m1", 1), ("m2", 2), ("m3", 3), ("m4", 2)])
+            self.assertEqual(tuple(conversation), (None, 0))
+            self.assertEqual(tokens, [None] * 5)
+            indexes = {i["name"] for i in inspect(engine).get_indexes("messages")}
+            self.assertIn("ix_messages_conversation_seq", indexes)
+            engine.dispose()
+
+if __name__ == "__main__":
+    unittest.main()
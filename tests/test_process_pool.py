@@ -0,0 +1,33 @@
+import unittest
+
+from runtime.core.process_pool import NodeProcessPool
+from runtime.nodes.simple import MathNode, SleepNode
+
+class CancelTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = NodeProcessPool(max_workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_waiting_task_can_be_cancelled(self):
+        busy = self.pool.submit(SleepNode("busy", {}), {"duration": 0.3})
+        waiting = self.pool.submit(MathNode("waiting", {}), {"a": 1, "b": 2})
+        self.assertTrue(busy.running())
+        self.assertTrue(waiting.cancel())
+        self.assertEqual(busy.result(timeout=10)["status"], "slept")
+
+        # The worker is free again and the cancelled task never ran
+        after = self.pool.submit(MathNode("after", {}), {"a": 3, "b": 4})
+        self.assertEqual(after.result(timeout=10), {"result": 7.0})
+        self.assertTrue(waiting.cancelled())
+
+    def test_running_task_is_not_cancelled(self):
+        running = self.pool.submit(SleepNode("running", {}), {"duration": 0.1})
+        self.assertFalse(running.cancel())
+        self.assertEqual(running.result(timeout=10)["duration"], 0.1)
+
+if __name__ == "__main__":
+    unittest.main()
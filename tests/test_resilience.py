@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import io
+import unittest
+
+from runtime.core.resilience import arun_with_policy, get_latency_stats, node_policy, run_with_policy
+from runtime.nodes.simple import BaseNode, PrintNode
+
+class StreamNode(BaseNode):
+    """Streams "Mock answer" a token at a time; each attempt pops its setup from `plans`."""
+
+    idempotent = True
+    plans = []  # (seconds before the first token, fail after the first token)
+
+    def run(self, inputs):
+        first_token_after, fail = self.plans.pop(0)
+        self.wait(first_token_after)
+        parts = []
+        for token in ["Mock", " answer"]:
+            parts.append(token)
+            self.emit("token", token)
+            if fail:
+                raise ConnectionError("stream dropped")
+            self.wait(0.02)
+        return {"text": "".join(parts)}
+
+def stream_node(config):
+    node = StreamNode("answer", {"type": "stream", "stream": True, **config})
+    tokens = []
+    node.on_event = lambda event, node_id, data: tokens.append(data) if event == "token" else None
+    return node, tokens
+
+class FallbackNode(BaseNode):
+    """Answers after a delay, degraded or not, or fails; each attempt pops its setup from `plans`."""
+
+    idempotent = True
+    plans = []  # (seconds before answering, "ok" | "degraded" | "fail")
+
+    def run(self, inputs):
+        delay, outcome = self.plans.pop(0)
+        self.wait(delay)
+        if outcome == "fail":
+            raise ConnectionError("upstream down")
+        return {"text": outcome, "degraded": outcome == "degraded"}
+
+def run_both(node_factory, plans, config):
+    # (result, latency samples recorded) from the sync and the async path
+    outcomes = []
+    for run in (run_with_policy, lambda *args: asyncio.run(arun_with_policy(*args))):
+        FallbackNode.plans = list(plans)
+        node = node_factory(config)
+        policy = node_policy(node, f"fallback-{len(outcomes)}-{id(node)}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run(node, policy, {})
+        outcomes.append((result, len(get_latency_stats()._samples.get(policy.key, ()))))
+    return outcomes
+
+class HedgeDefaultTest(unittest.TestCase):
+    def test_hedging_is_opt_in(self):
+        node, _ = stream_node({})
+        self.assertIsNone(node_policy(node, "stream"))
+        self.assertIsNone(node_policy(FallbackNode("answer", {"type": "llm"}), "plain"))
+        self.assertTrue(node_policy(FallbackNode("answer", {"type": "llm", "hedge": True}), "plain").hedge)
+        # A duplicate of a node with side effects is never sent
+        self.assertIsNone(node_policy(PrintNode("shout", {"type": "print", "hedge": True}), "plain"))
+
+class DegradedResultTest(unittest.TestCase):
+    def make(self, config):
+        return FallbackNode("answer", {"type": "llm", **config})
+
+    def test_degraded_result_loses_to_a_running_attempt(self):
+        # The primary falls back after the hedge went out; the hedge's real answer wins
+        for result, samples in run_both(self.make, [(0.1, "degraded"), (0.1, "ok")], {"hedge": {"after": 0.05}}):
+            self.assertEqual(result["text"], "ok")
+            self.assertEqual(samples, 1)
+
+    def test_degraded_result_is_kept_when_nothing_better_arrives(self):
+        for result, samples in run_both(self.make, [(0.1, "degraded"), (0.1, "fail")], {"hedge": {"after": 0.05}}):
+            self.assertEqual(result["text"], "degraded")
+            self.assertEqual(samples, 0)
+
+    def test_degraded_latency_is_never_recorded(self):
+        for result, samples in run_both(self.make, [(0.0, "degraded")], {"retry": 1}):
+            self.assertTrue(result["degraded"])
+            self.assertEqual(samples, 0)
+
+class StreamingHedgeTest(unittest.TestCase):
+
+    def test_only_the_winning_attempt_streams(self):
+        for run in (run_with_policy, lambda *args: asyncio.run(arun_with_policy(*args))):
+            # The primary stalls, the hedge streams first and owns the output
+            StreamNode.plans = [(0.3, False), (0.0, False)]
+            node, tokens = stream_node({"hedge": {"after": 0.05}})
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run(node, node_policy(node, "stream"), {})
+            self.assertEqual(tokens, ["Mock", " answer"])
+            self.assertEqual(result["text"], "Mock answer")
+            self.assertIs(node.stream_owner, node._attempts[1])
+            self.assertTrue(node._attempts[0].cancelled.is_set())
+
+    def test_no_retry_after_the_first_token(self):
+        StreamNode.plans = [(0.0, True), (0.0, False)]
+        node, tokens = stream_node({"retry": {"times": 1, "backoff": 0}})
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(ConnectionError):
+                run_with_policy(node, node_policy(node, "stream"), {})
+        self.assertEqual(tokens, ["Mock"])
+        self.assertEqual(len(node._attempts), 1)
+
+class LatencyKeyTest(unittest.TestCase):
+    def test_workflows_sharing_a_node_id_keep_separate_windows(self):
+        node = StreamNode("answer", {"type": "stream", "hedge": True})
+        self.assertNotEqual(node_policy(node, "support").key, node_policy(node, "billing").key)
+
+if __name__ == "__main__":
+    unittest.main()
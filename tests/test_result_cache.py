@@ -0,0 +1,52 @@
+import contextlib
+import io
+import unittest
+
+from runtime.core.engine import WorkflowEngine
+from runtime.memory.memory import GlobalMemory
+from runtime.memory.result_cache import ResultCache
+from runtime.nodes import NODE_CLASSES
+from runtime.nodes.llm import LLMNode
+from runtime.parser.dsl_parser import parse_workflow
+
+class OutageLLMNode(LLMNode):
+    """An LLM node whose API call always fails, so it falls back to the mock response."""
+
+    def run(self, inputs):
+        request = self._request(inputs)
+        return self._result(request, *self._fallback(request, ConnectionError("API unreachable")))
+
+NODE_CLASSES["outage_llm"] = OutageLLMNode
+
+WORKFLOW = """
+id: outage
+nodes:
+  classify:
+    type: outage_llm
+    cache: {ttl: 3600}
+    inputs:
+      model: mock
+      prompt: "Classify {{ inputs.query }}"
+"""
+
+class DegradedResultTest(unittest.TestCase):
+    def run_once(self, graph, cache):
+        memory = GlobalMemory({"inputs": {"query": "my ec2 is down"}})
+        with contextlib.redirect_stdout(io.StringIO()):
+            WorkflowEngine(graph, memory, result_cache=cache).run()
+        return memory.to_dict()["classify"]
+
+    def test_fallback_result_is_not_cached(self):
+        graph = parse_workflow(WORKFLOW)
+        cache = ResultCache()
+
+        first = self.run_once(graph, cache)
+        self.assertTrue(first["degraded"])
+        self.assertIn("MOCK LLM RESPONSE", first["text"])
+
+        # The next run calls the API again instead of serving the stand-in
+        self.run_once(graph, cache)
+        self.assertEqual(cache.stats()["classify"], {"hits": 0, "misses": 2, "hit_rate": 0.0})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+from typing import Any, Dict
+
+from runtime.core.engine import WorkflowEngine
+from runtime.core.scheduler import DependencyTracker, ReadyQueue
+from runtime.memory.memory import GlobalMemory
+from runtime.nodes import NODE_CLASSES
+from runtime.nodes.simple import BaseNode
+from runtime.parser.dsl_parser import parse_workflow
+
+class ActiveCountNode(BaseNode):
+    """Sleeps briefly and records how many nodes of its resource class run at once."""
+    lock = threading.Lock()
+    active: Dict[str, int] = {}
+    peak: Dict[str, int] = {}
+
+    def run(self, inputs: Dict[str, Any]) -> Any:
+        resource = self.config.get("resource", "default")
+        with self.lock:
+            self.active[resource] = self.active.get(resource, 0) + 1
+            self.peak[resource] = max(self.peak.get(resource, 0), self.active[resource])
+        time.sleep(0.02)
+        with self.lock:
+            self.active[resource] -= 1
+        return {"ok": True}
+
+NODE_CLASSES.setdefault("active_count", ActiveCountNode)
+
+def drain(queue: ReadyQueue) -> list:
+    popped = []
+    while True:
+        node_id = queue.pop()
+        if node_id is None:
+            return popped
+        popped.append(node_id)
+
+class ReadyQueueTest(unittest.TestCase):
+    def test_longest_critical_path_first_then_declaration_order(self):
+        graph = parse_workflow("""
+id: order
+nodes:
+  short_a: {type: print, inputs: {message: a}}
+  head: {type: print, inputs: {message: h}}
+  short_b: {type: print, inputs: {message: b}}
+  middle: {type: print, depends_on: [head], inputs: {message: m}}
+  tail: {type: print, depends_on: [middle], inputs: {message: t}}
+""")
+        tracker = DependencyTracker(graph)
+        self.assertEqual(drain(tracker.ready), ["head", "short_a", "short_b"])
+
+    def test_caps_are_per_resource_class(self):
+        graph = parse_workflow("""
+id: caps
+resources: {io: 2}
+nodes:
+  s1: {type: print, resource: io, inputs: {message: "1"}}
+  s2: {type: print, resource: io, inputs: {message: "2"}}
+  s3: {type: print, resource: io, inputs: {message: "3"}}
+  s4: {type: print, resource: io, inputs: {message: "4"}}
+  p1: {type: print, inputs: {message: p}}
+""")
+        queue = DependencyTracker(graph).ready
+        self.assertEqual(queue.limits, {"io": 2, "default": 10})
+        # A saturated class doesn't block the others
+        self.assertEqual(sorted(drain(queue)), ["p1", "s1", "s2"])
+        queue.release("s1")
+        self.assertEqual(drain(queue), ["s3"])
+        self.assertEqual(len(queue), 1)
+
+        # With a backlog the queue hands out more than the cap, for an
+        # executor that enforces it
+        queue = DependencyTracker(graph, backlog=1).ready
+        self.assertEqual(sorted(drain(queue)), ["p1", "s1", "s2", "s3", "s4"])
+        self.assertEqual(queue.in_use, {"io": 4, "default": 1})
+
+class DependencyTrackerTest(unittest.TestCase):
+    GRAPH = """
+id: skips
+nodes:
+  a: {type: print, inputs: {message: a}}
+  b: {type: print, inputs: {message: b}}
+  only_a: {type: print, depends_on: [a], inputs: {message: x}}
+  after_only_a: {type: print, depends_on: [only_a], inputs: {message: y}}
+  join: {type: print, depends_on: [a, b], inputs: {message: j}}
+"""
+
+    def test_skip_propagates_when_every_dependency_is_skipped(self):
+        tracker = DependencyTracker(parse_workflow(self.GRAPH))
+        drain(tracker.ready)
+        self.assertEqual(tracker.mark_skipped("a"), ["only_a", "after_only_a"])
+        self.assertFalse(tracker.is_skipped("join"))
+        self.assertEqual(tracker.mark_skipped("b"), ["join"])
+        self.assertTrue(tracker.is_finished())
+
+    def test_one_completed_dependency_is_enough_to_run(self):
+        tracker = DependencyTracker(parse_workflow(self.GRAPH))
+        drain(tracker.ready)
+        tracker.mark_completed("a")
+        self.assertEqual(tracker.mark_skipped("b"), [])
+        self.assertEqual(sorted(drain(tracker.ready)), ["join", "only_a"])
+        self.assertEqual(tracker.dispatch("join"), "run")
+        self.assertIsNone(tracker.dispatch("join"))
+
+class EngineCapTest(unittest.TestCase):
+    def test_pools_enforce_the_caps(self):
+        nodes = "".join(f"  n{i}: {{type: active_count, resource: {'io' if i % 2 else 'default'}}}\n"
+                        for i in range(12))
+        graph = parse_workflow(f"id: caps\nresources: {{io: 2, default: 3}}\nnodes:\n{nodes}")
+        ActiveCountNode.peak.clear()
+        memory = GlobalMemory({"inputs": {}})
+        with contextlib.redirect_stdout(io.StringIO()):
+            WorkflowEngine(graph, memory).run()
+        self.assertEqual(len(memory.to_dict()), 13)  # 12 nodes + inputs
+        self.assertEqual(ActiveCountNode.peak, {"io": 2, "default": 3})
+
+if __name__ == "__main__":
+    unittest.main()
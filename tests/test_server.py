@@ -0,0 +1,69 @@
+import contextlib
+import http.client
+import io
+import json
+import threading
+import time
+import unittest
+
+from runtime.server import WorkflowRegistry, WorkflowServer
+
+WORKFLOW = """
+id: add
+nodes:
+  add:
+    type: math
+    inputs:
+      a: "{{ inputs.a }}"
+      b: "{{ inputs.b }}"
+      op: add
+"""
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        registry = WorkflowRegistry()
+        registry.register(WORKFLOW)
+        self.server = WorkflowServer(("127.0.0.1", 0), registry)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post(self, body: bytes):
+        self.conn.request("POST", "/workflows/add/run", body=body, headers={"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_keep_alive_requests_are_not_delayed(self):
+        latencies = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(6):
+                start = time.perf_counter()
+                status, result = self.post(json.dumps({"inputs": {"a": i, "b": 1}}).encode())
+                latencies.append(time.perf_counter() - start)
+                self.assertEqual(status, 200)
+                self.assertEqual(result["memory"]["add"]["result"], i + 1)
+        # Nagle plus delayed ACK would add ~40ms to each request after the first
+        self.assertLess(max(latencies[1:]), 0.03, latencies)
+
+    def test_non_object_bodies_are_rejected(self):
+        for body in (b"[1]", b'"x"', b'{"inputs": [1]}'):
+            status, result = self.post(body)
+            self.assertEqual(status, 400)
+            self.assertIn("error", result)
+        # The connection is still usable
+        with contextlib.redirect_stdout(io.StringIO()):
+            status, result = self.post(b'{"inputs": {"a": 1, "b": 2}}')
+        self.assertEqual(status, 200)
+        self.assertEqual(result["memory"]["add"]["result"], 3)
+
+    def test_bind_failure_surfaces_the_os_error(self):
+        # Port in use: the bind error, not an AttributeError from server_close()
+        with self.assertRaises(OSError):
+            WorkflowServer(self.server.server_address, WorkflowRegistry())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import contextlib
+import io
+import unittest
+
+from runtime.core.async_engine import AsyncWorkflowEngine
+from runtime.core.engine import WorkflowEngine
+from runtime.memory.memory import GlobalMemory
+from runtime.parser.dsl_parser import parse_workflow
+
+SPECULATIVE = """
+id: speculate
+nodes:
+  classify:
+    type: sleep
+    inputs: {duration: %(classify)s}
+  search:
+    type: mock_search
+    speculative: true
+    condition: "{{ classify.status == 'slept' and inputs.go }}"
+    inputs: {query: "{{ inputs.query }}", source: official_docs, duration: %(search)s}
+  report:
+    type: print
+    inputs: {message: "{{ search.results }}"}
+"""
+
+EARLY_SKIP = """
+id: early_skip
+nodes:
+  gate:
+    type: math
+    inputs: {a: 1, b: 2, op: add}
+  slow:
+    type: sleep
+    inputs: {duration: 0.3}
+  guarded:
+    type: print
+    depends_on: [slow]
+    condition: "{{ gate.result > 100 }}"
+    inputs: {message: guarded}
+  downstream:
+    type: print
+    inputs: {message: "{{ guarded.printed }}"}
+  unrelated:
+    type: print
+    depends_on: [slow]
+    inputs: {message: "{{ slow.status }}"}
+"""
+
+ENGINES = (WorkflowEngine, AsyncWorkflowEngine)
+
+def run(engine_cls, dsl: str, inputs):
+    events = []
+    memory = GlobalMemory({"inputs": inputs})
+    engine = engine_cls(parse_workflow(dsl), memory,
+                        on_event=lambda event, node_id, data: events.append((event, node_id)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.run()
+    return memory.to_dict(), events
+
+class SpeculationTest(unittest.TestCase):
+    def test_discarded_result_is_never_recorded(self):
+        # The speculative run finishes first, or is still running when its condition fails
+        for timings in ({"classify": 0.2, "search": 0.01}, {"classify": 0.01, "search": 0.3}):
+            for engine_cls in ENGINES:
+                memory, events = run(engine_cls, SPECULATIVE % timings, {"query": "ec2", "go": False})
+                label = (engine_cls.__name__, timings)
+                # Started speculatively, before its condition could be decided
+                self.assertLess(events.index(("node_started", "search")), events.index(("node_completed", "classify")), label)
+                self.assertNotIn("search", memory, label)
+                self.assertNotIn("report", memory, label)
+                self.assertNotIn(("node_completed", "search"), events, label)
+                self.assertIn(("node_skipped", "search"), events, label)
+                self.assertIn(("node_skipped", "report"), events, label)
+
+    def test_committed_result_is_recorded_once(self):
+        for engine_cls in ENGINES:
+            memory, events = run(engine_cls, SPECULATIVE % {"classify": 0.1, "search": 0.01},
+                                 {"query": "ec2", "go": True})
+            self.assertIn("EC2", memory["search"]["results"])
+            self.assertEqual(events.count(("node_completed", "search")), 1)
+            self.assertEqual(memory["report"]["printed"], memory["search"]["results"])
+
+    def test_early_skip_propagates_downstream(self):
+        for engine_cls in ENGINES:
+            memory, events = run(engine_cls, EARLY_SKIP, {})
+            for node_id in ("guarded", "downstream"):
+                self.assertNotIn(node_id, memory)
+                self.assertIn(("node_skipped", node_id), events)
+            self.assertEqual(memory["unrelated"]["printed"], "slept")
+            # Decided as soon as `gate` completed, not after `slow`
+            self.assertLess(events.index(("node_skipped", "downstream")), events.index(("node_completed", "slow")))
+
+if __name__ == "__main__":
+    unittest.main()